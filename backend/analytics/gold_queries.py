@@ -2,11 +2,16 @@ from sqlalchemy.orm import Session
 from dateutil.relativedelta import relativedelta
 from sqlalchemy import (
     Date,
+    func,
+    select,
 )
 
 from backend.core.types import Result
 from backend.models.models import (
+    CategoryVsBudget,
     MonthlyExpenses,
+    MonthlyKpis,
+    PipelineConfiguration,
     SavingsRate,
 )
 
@@ -39,3 +44,84 @@ def get_savings_rate_summary(db: Session) -> Result:
     result = db.query(SavingsRate).all()
 
     return Result(success=bool(result), data=result)
+
+
+def get_gold_version(db: Session) -> Result:
+    """
+    Retrieve a stamp of the gold layer state: the latest run of its generators.
+    It changes after every gold run, cached results keyed by it stay valid until then.
+    """
+    result = db.execute(select(func.max(PipelineConfiguration.last_run))).scalar()
+
+    return Result(success=True, data=result)
+
+
+def get_dashboard_summary(db: Session, transaction_month: Date) -> Result:
+    """
+    Retrieve the data of the dashboard in one round trip: the precomputed KPIs
+    of the given month and the savings rate of all months.
+    """
+    transaction_month_col = func.coalesce(
+        MonthlyKpis.transaction_month, SavingsRate.transaction_month
+    ).label("transaction_month")
+    statement = (
+        select(
+            transaction_month_col,
+            MonthlyKpis.total_expenses,
+            MonthlyKpis.total_earnings,
+            MonthlyKpis.total_savings,
+            MonthlyKpis.previous_total_expenses,
+            MonthlyKpis.expenses_change,
+            MonthlyKpis.earnings_change,
+            MonthlyKpis.savings_change,
+            SavingsRate.savings_rate,
+        )
+        .join_from(
+            MonthlyKpis,
+            SavingsRate,
+            MonthlyKpis.transaction_month == SavingsRate.transaction_month,
+            full=True,
+        )
+        .order_by(transaction_month_col)
+    )
+    rows = db.execute(statement).all()
+
+    kpis = next(
+        (
+            row
+            for row in rows
+            if row.transaction_month == transaction_month
+            and row.total_expenses is not None
+        ),
+        None,
+    )
+
+    return Result(
+        success=bool(rows),
+        data={
+            "kpis": kpis,
+            "savings_rate": [
+                (row.transaction_month, row.savings_rate)
+                for row in rows
+                if row.savings_rate is not None
+            ],
+        },
+    )
+
+
+def get_category_vs_budget(db: Session, transaction_month: Date) -> Result:
+    """
+    Retrieve the expenses per category and their budget for a given month,
+    precomputed in g_t_category_vs_budget.
+    """
+    result = db.execute(
+        select(
+            CategoryVsBudget.category,
+            CategoryVsBudget.total_expenses,
+            CategoryVsBudget.budget,
+        )
+        .where(CategoryVsBudget.transaction_month == transaction_month)
+        .order_by(CategoryVsBudget.category)
+    ).all()
+
+    return Result(success=bool(result), data=result)
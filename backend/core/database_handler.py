@@ -1,27 +1,65 @@
 # backend/core/database_handler.py
 
 from contextlib import contextmanager
+from functools import lru_cache
 from typing import Generator
-import streamlit as st
-from sqlalchemy import create_engine, text
+from sqlalchemy import Engine, create_engine, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import Session
 from sqlalchemy.schema import CreateSchema
+from backend.core.settings import get_settings
+
+DEFAULT_POOL_OPTIONS = {
+    "pool_size": 5,
+    "max_overflow": 10,
+    "pool_pre_ping": True,
+    "pool_recycle": 1800,
+}
+
+
+@lru_cache(maxsize=None)
+def get_engine(
+    database_url: str,
+    pool_size: int = DEFAULT_POOL_OPTIONS["pool_size"],
+    max_overflow: int = DEFAULT_POOL_OPTIONS["max_overflow"],
+    pool_pre_ping: bool = DEFAULT_POOL_OPTIONS["pool_pre_ping"],
+    pool_recycle: int = DEFAULT_POOL_OPTIONS["pool_recycle"],
+) -> Engine:
+    """
+    Returns the process-wide engine for a database URL and pool configuration.
+    All handlers share it, so connections are pooled across the application.
+    """
+    return create_engine(
+        database_url,
+        future=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=pool_pre_ping,
+        pool_recycle=pool_recycle,
+    )
 
 
 class DatabaseHandler:
     """
     A class to handle database sessions and create schemas on 1st run.
     Provides flexibility for managing database connections.
+    Handlers reuse the shared engine of their database URL, pool options
+    (pool_size, max_overflow, pool_pre_ping, pool_recycle) are read from
+    the database settings.
     """
 
     def __init__(self) -> None:
-        self.database_url = st.secrets.database.database_url
+        database_settings = get_settings().get("database", {})
+        self.database_url = database_settings.get("database_url")
 
         if not self.database_url:
             raise ValueError("DATABASE_URL not set in environment variables")
 
-        self.engine = create_engine(self.database_url, future=True)
+        pool_options = {
+            option: database_settings.get(option, default)
+            for option, default in DEFAULT_POOL_OPTIONS.items()
+        }
+        self.engine = get_engine(self.database_url, **pool_options)
         self._session_local = sessionmaker(
             bind=self.engine, autocommit=False, autoflush=True
         )
@@ -0,0 +1,125 @@
+"""
+This module provides a class `FileCache`:
+    - Keeps local copies of the files stored in kDrive, keyed by checksum.
+    - Evicts the least recently used files above a size cap.
+Files are immutable and identified by Files.checksum, so a cached copy never
+goes stale. The cache can be shared by several processes: files are written
+to a temporary name and renamed, and a file evicted by another process is a
+plain cache miss.
+Classes:
+    FileCache: On-disk, content-addressed LRU cache.
+Usage example:
+    file_cache = get_file_cache()
+    file_content = file_cache.open(checksum)
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+from backend.core.settings import get_settings
+from backend.core.types import Result
+
+DEFAULT_CACHE_DIRECTORY = os.path.join(tempfile.gettempdir(), "expenses-ingestion")
+DEFAULT_CACHE_MAX_SIZE_MB = 512
+
+
+class FileCache:
+    """On-disk copies of kDrive files, keyed by checksum, evicted least recently used first"""
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def open(self, checksum: str) -> Optional[BinaryIO]:
+        """Returns the cached file opened for reading, or None on a miss."""
+        path = self._path(checksum)
+
+        try:
+            file_content = path.open("rb")
+        except OSError:
+            return None
+
+        # the modification time orders the files for eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return file_content
+
+    def put(self, checksum: str, file_content: Union[bytes, BinaryIO]) -> Result:
+        """
+        Stores a copy of the file, then evicts the least recently used files
+        above the size cap. A file object is read from its current position
+        and rewound to it afterwards. Nothing is stored when the cache is
+        disabled, with a size cap of 0.
+        """
+        if self.max_bytes <= 0:
+            return Result(success=True, message="File cache is disabled.")
+
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=self.directory, suffix=".tmp", delete=False
+            ) as temporary_file:
+                if isinstance(file_content, (bytes, bytearray, memoryview)):
+                    temporary_file.write(file_content)
+                else:
+                    position = file_content.tell()
+                    shutil.copyfileobj(file_content, temporary_file)
+                    file_content.seek(position)
+            os.replace(temporary_file.name, self._path(checksum))
+        except OSError as e:
+            return Result(
+                success=False,
+                message=f"An error occurred while caching the file: {e}",
+            )
+
+        self._evict()
+        return Result(success=True, message="File cached successfully.")
+
+    def discard(self, checksum: str) -> None:
+        """Removes the cached copy of a file, if any."""
+        try:
+            self._path(checksum).unlink()
+        except OSError:
+            pass
+
+    def _path(self, checksum: str) -> Path:
+        return self.directory / checksum
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for path in self.directory.iterdir():
+                if path.suffix == ".tmp":
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+            total_bytes = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total_bytes <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total_bytes -= size
+
+
+@lru_cache(maxsize=1)
+def get_file_cache() -> FileCache:
+    """Process-wide cache configured by the [cache] settings."""
+    cache_settings = get_settings().get("cache", {})
+    return FileCache(
+        cache_settings.get("directory", DEFAULT_CACHE_DIRECTORY),
+        int(cache_settings.get("max_size_mb", DEFAULT_CACHE_MAX_SIZE_MB) * 1024 * 1024),
+    )
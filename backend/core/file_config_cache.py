@@ -0,0 +1,85 @@
+"""
+This module provides a class `FileConfigCache`:
+    - Keeps cfg_t_file_config in memory with precompiled file patterns.
+    - Resolves file names to configurations without database round trips.
+Classes:
+    FileConfigCache: In-memory, TTL based copy of the file configurations.
+Usage example:
+    matches = file_config_cache.match(db_handler, "UBS_2024_01.csv")
+"""
+
+import re
+import threading
+import time
+from typing import Optional
+from backend.core.database_handler import DatabaseHandler
+from backend.models.models import FileConfiguration
+
+DEFAULT_FILE_CONFIG_TTL_SECONDS = 300
+
+
+class FileConfigCache:
+    """In-memory copy of cfg_t_file_config, reloaded after a TTL or on invalidate()"""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_FILE_CONFIG_TTL_SECONDS) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._configs: dict[int, FileConfiguration] = {}
+        self._patterns: list[tuple[re.Pattern, FileConfiguration]] = []
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get(
+        self, db_handler: DatabaseHandler, config_id: int
+    ) -> Optional[FileConfiguration]:
+        """Returns the configuration, reloading once if the ID is unknown."""
+        self._ensure_loaded(db_handler)
+        config = self._configs.get(config_id)
+
+        if config is None:
+            self.invalidate()
+            self._ensure_loaded(db_handler)
+            config = self._configs.get(config_id)
+        return config
+
+    def match(self, db_handler: DatabaseHandler, file_name: str) -> list[FileConfiguration]:
+        """
+        Returns every configuration whose file pattern matches the file name.
+        Patterns are searched like the PostgreSQL ~ operator.
+        """
+        self._ensure_loaded(db_handler)
+        return [config for pattern, config in self._patterns if pattern.search(file_name)]
+
+    def invalidate(self) -> None:
+        """Forgets the cached configurations, to be called after cfg_t_file_config changes."""
+        with self._lock:
+            self._loaded_at = None
+
+    def _ensure_loaded(self, db_handler: DatabaseHandler) -> None:
+        with self._lock:
+            if (
+                self._loaded_at is not None
+                and time.monotonic() - self._loaded_at < self.ttl_seconds
+            ):
+                return
+
+            with db_handler.get_db_session() as session:
+                configs = session.query(FileConfiguration).all()
+                session.expunge_all()
+
+            patterns, errors = [], []
+            for config in configs:
+                try:
+                    patterns.append((re.compile(config.file_pattern), config))
+                except re.error as e:
+                    errors.append(f"{config.config_id} ({config.file_pattern}): {e}")
+
+            if errors:
+                raise ValueError("Invalid file patterns:\n" + "\n".join(errors))
+
+            self._configs = {config.config_id: config for config in configs}
+            self._patterns = patterns
+            self._loaded_at = time.monotonic()
+
+
+# process-wide cache
+file_config_cache = FileConfigCache()
@@ -1,12 +1,18 @@
-from typing import Any
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Iterable, Optional
+import pandas as pd
 from backend.core.types import Result
-from sqlalchemy import update, text
+from sqlalchemy import String, Date, any_, bindparam, func, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 from backend.core.database_handler import DatabaseHandler
+from backend.core.file_config_cache import file_config_cache
 from backend.models.models import (
     Expense,
     FailedExpense,
     Files,
-    FileConfiguration,
+    FileStatusEnum,
+    GoldRefreshMonth,
 )
 
 
@@ -55,6 +61,68 @@ class FileHandler:
                     message=f"An error occurred while updating file attribute: {e}",
                 )
 
+    def update_file_attributes(
+        self,
+        file_ids: list[str],
+        values: dict[str, Any],
+        file_status: Optional[FileStatusEnum] = None,
+    ) -> Result:
+        """
+        Update several attributes of the given files in one statement.
+        With file_status, only the files currently in that status are updated.
+        """
+        with self.db_handler.get_db_session() as session:
+            try:
+                statement = (
+                    update(Files).where(Files.file_id.in_(file_ids)).values(values)
+                )
+                if file_status is not None:
+                    statement = statement.where(
+                        Files.file_status_id == file_status.value
+                    )
+                session.execute(statement)
+
+                return Result(
+                    success=True, message="File attributes updated successfully."
+                )
+            except Exception as e:
+                session.rollback()
+                return Result(
+                    success=False,
+                    message=f"An error occurred while updating file attributes: {e}",
+                )
+
+    def recover_interrupted_files(self) -> Result:
+        """
+        Reset the files left IN_PROGRESS by a stopped process to UPLOADED.
+        Their silver load runs in one transaction, so nothing of them was stored.
+        """
+        with self.db_handler.get_db_session() as session:
+            try:
+                statement = (
+                    update(Files)
+                    .where(Files.file_status_id == FileStatusEnum.IN_PROGRESS.value)
+                    .values(
+                        file_status_id=FileStatusEnum.UPLOADED.value,
+                        processing_stage=None,
+                        rows_processed=None,
+                        error_message="Processing was interrupted, start it again.",
+                    )
+                )
+                recovered = session.execute(statement).rowcount
+
+                return Result(
+                    success=True,
+                    message=f"{recovered} interrupted file(s) reset.",
+                    data=recovered,
+                )
+            except Exception as e:
+                session.rollback()
+                return Result(
+                    success=False,
+                    message=f"An error occurred while resetting interrupted files: {e}",
+                )
+
     def delete_file_metadata(self, file_id: str) -> Result:
         """Deletes file record from DB and cascades to other tables."""
         with self.db_handler.get_db_session() as session:
@@ -62,6 +130,19 @@ class FileHandler:
                 file_rec = session.query(Files).filter(Files.file_id == file_id).first()
 
                 if file_rec:
+                    # the months of the cascaded expenses must be refreshed in gold
+                    file_months = (
+                        select(
+                            func.date_trunc("month", Expense.transaction_date).cast(Date)
+                        )
+                        .where(Expense.file_id == file_id)
+                        .distinct()
+                    )
+                    session.execute(
+                        insert(GoldRefreshMonth)
+                        .from_select(["transaction_month"], file_months)
+                        .on_conflict_do_nothing(index_elements=["transaction_month"])
+                    )
                     session.delete(file_rec)
                     return Result(
                         success=True, message="File record deleted successfully."
@@ -91,51 +172,75 @@ class FileHandler:
                     message=f"An error occurred while checking for checksum: {e}",
                 )
 
+    def get_file_checksum(self, file_id: str) -> Result:
+        """Retrieve the checksum of a file"""
+        try:
+            with self.db_handler.get_db_session() as session:
+                checksum = session.execute(
+                    select(Files.checksum).where(Files.file_id == file_id)
+                ).scalar_one_or_none()
+        except Exception as e:
+            return Result(
+                success=False,
+                message=f"An error occurred while retrieving the file checksum: {e}",
+            )
+
+        if checksum:
+            return Result(success=True, data=checksum)
+        return Result(success=False, message="No file found with the given ID.")
+
+    def get_existing_checksums(self, checksums: list[str]) -> Result:
+        """Return the subset of the given checksums already stored, in a single query"""
+        try:
+            with self.db_handler.get_db_session() as session:
+                statement = select(Files.checksum).where(
+                    Files.checksum == any_(bindparam("checksums", checksums, type_=ARRAY(String)))
+                )
+                existing = set(session.execute(statement).scalars())
+        except Exception as e:
+            return Result(
+                success=False,
+                message=f"An error occurred while checking for checksums: {e}",
+            )
+
+        return Result(success=True, data=existing)
+
     def determine_file_config_id(self, file_name: str) -> Result:
         """Determine the file configuration ID based on the file name by comparing against existing patterns in file_pattern column of cfg_t_file_config table"""
-        with self.db_handler.get_db_session() as session:
-            try:
-                statement = text(
-                    "SELECT config_id FROM cfg_sch.cfg_t_file_config WHERE :file_name ~ file_pattern"
-                ).bindparams(file_name=file_name)
-                response = session.execute(statement).first()
+        try:
+            matches = file_config_cache.match(self.db_handler, file_name)
+        except Exception as e:
+            return Result(
+                success=False,
+                message=f"An error occurred while determining file configuration ID: {e}",
+            )
 
-                if response:
-                    return Result(
-                        success=True, data=int(response[0])
-                    )  # Ensure the ID is returned as an integer
-                else:
-                    return Result(
-                        success=False, message="No matching file configuration found."
-                    )
-            except Exception as e:
-                return Result(
-                    success=False,
-                    message=f"An error occurred while determining file configuration ID: {e}",
-                )
+        if len(matches) > 1:
+            config_ids = ", ".join(str(config.config_id) for config in matches)
+            return Result(
+                success=False,
+                message=f"File name matches several file configurations: {config_ids}.",
+            )
+        if matches:
+            return Result(success=True, data=int(matches[0].config_id))
+        return Result(success=False, message="No matching file configuration found.")
 
     def get_file_config(self, file_config_id: int) -> Result:
         """Retrieve file configuration based on the file configuration ID"""
-        with self.db_handler.get_db_session() as session:
-            try:
-                response = (
-                    session.query(FileConfiguration)
-                    .filter(FileConfiguration.config_id == file_config_id)
-                    .first()
-                )
-                if response:
-                    session.expunge(response)
-                    return Result(success=True, data=response)
-                else:
-                    return Result(
-                        success=False,
-                        message="No file configuration found with the given ID.",
-                    )
-            except Exception as e:
-                return Result(
-                    success=False,
-                    message=f"An error occurred while retrieving file configuration: {e}",
-                )
+        try:
+            response = file_config_cache.get(self.db_handler, file_config_id)
+        except Exception as e:
+            return Result(
+                success=False,
+                message=f"An error occurred while retrieving file configuration: {e}",
+            )
+
+        if response:
+            return Result(success=True, data=response)
+        return Result(
+            success=False,
+            message="No file configuration found with the given ID.",
+        )
 
     def get_all_files(self) -> Result:
         """Retrieve all files from the database"""
@@ -153,6 +258,129 @@ class FileHandler:
                     message=f"An error occurred while retrieving files: {e}",
                 )
 
+    def list_files(
+        self,
+        page_size: int,
+        after: Optional[tuple[datetime, str]] = None,
+        file_status_id: Optional[int] = None,
+        file_source: Optional[str] = None,
+        inserted_from: Optional[date] = None,
+        inserted_to: Optional[date] = None,
+    ) -> Result:
+        """
+        Retrieve one page of files, newest first, with only the listed columns.
+        Pages are read with keyset pagination on (inserted_datetime, file_id),
+        served by its index, so every page costs the same whatever the offset.
+
+        Parameters:
+        - page_size: number of files per page.
+        - after: (inserted_datetime, file_id) of the last file of the previous page.
+        - file_status_id, file_source: optional filters.
+        - inserted_from, inserted_to: optional inclusive range of upload dates.
+
+        Returns the files and the cursor of the next page, None on the last page.
+        """
+        try:
+            with self.db_handler.get_db_session() as session:
+                statement = select(
+                    Files.file_id,
+                    Files.file_name,
+                    Files.file_source,
+                    Files.file_size,
+                    Files.number_rows,
+                    Files.checksum,
+                    Files.file_status_id,
+                    Files.file_config_id,
+                    Files.error_message,
+                    Files.processing_stage,
+                    Files.rows_processed,
+                    Files.inserted_datetime,
+                )
+                if after is not None:
+                    statement = statement.where(
+                        tuple_(Files.inserted_datetime, Files.file_id) < tuple_(*after)
+                    )
+                if file_status_id is not None:
+                    statement = statement.where(Files.file_status_id == file_status_id)
+                if file_source is not None:
+                    statement = statement.where(Files.file_source == file_source)
+                if inserted_from is not None:
+                    statement = statement.where(Files.inserted_datetime >= inserted_from)
+                if inserted_to is not None:
+                    statement = statement.where(
+                        Files.inserted_datetime < inserted_to + timedelta(days=1)
+                    )
+
+                # one extra row tells whether there is a next page
+                rows = session.execute(
+                    statement.order_by(
+                        Files.inserted_datetime.desc(), Files.file_id.desc()
+                    ).limit(page_size + 1)
+                ).all()
+        except Exception as e:
+            return Result(
+                success=False,
+                message=f"An error occurred while retrieving files: {e}",
+            )
+
+        files = [row._asdict() for row in rows[:page_size]]
+        next_cursor = None
+        if len(rows) > page_size:
+            next_cursor = (files[-1]["inserted_datetime"], files[-1]["file_id"])
+
+        return Result(success=True, data={"files": files, "next_cursor": next_cursor})
+
+    def get_file_sources(self) -> Result:
+        """Retrieve the distinct sources of the uploaded files"""
+        try:
+            with self.db_handler.get_db_session() as session:
+                sources = session.execute(
+                    select(Files.file_source).distinct().order_by(Files.file_source)
+                ).scalars().all()
+        except Exception as e:
+            return Result(
+                success=False,
+                message=f"An error occurred while retrieving file sources: {e}",
+            )
+
+        return Result(success=True, data=list(sources))
+
+    def get_files_to_process(
+        self,
+        file_ids: Optional[list[str]] = None,
+        file_status: FileStatusEnum = FileStatusEnum.UPLOADED,
+    ) -> Result:
+        """
+        Retrieve the file and configuration IDs of the files to process.
+        Returns the given files that are UPLOADED or FAILED, the others are
+        being or were already loaded, or every active file in file_status if
+        none is given.
+        """
+        try:
+            with self.db_handler.get_db_session() as session:
+                statement = select(Files.file_id, Files.file_config_id)
+                if file_ids is not None:
+                    statement = statement.where(
+                        Files.file_id.in_(file_ids),
+                        Files.file_status_id.in_(
+                            [FileStatusEnum.UPLOADED.value, FileStatusEnum.FAILED.value]
+                        ),
+                    )
+                else:
+                    statement = statement.where(
+                        Files.file_status_id == file_status.value,
+                        Files.active.is_(True),
+                    )
+
+                rows = session.execute(statement.order_by(Files.inserted_datetime)).all()
+        except Exception as e:
+            return Result(
+                success=False,
+                message=f"An error occurred while retrieving files to process: {e}",
+            )
+
+        return Result(success=True, data=[row._asdict() for row in rows])
+
     def insert_expenses(
         self, expense: Expense | FailedExpense, data_condition: str
     ) -> Result:
@@ -181,3 +409,115 @@ class FileHandler:
                     success=False,
                     message=f"An error occurred while inserting data: {e}",
                 )
+
+    def insert_expenses_batch(
+        self, expenses: list[dict], failed_expenses: list[dict]
+    ) -> Result:
+        """
+        Load all good and failed rows of a file in a single transaction.
+
+        Rows are sent with executemany, which the psycopg2 dialect turns into
+        multi-row INSERT statements. Either every row is stored or none is.
+
+        Parameters:
+        - expenses: list of dicts with the s_t_expenses column values.
+        - failed_expenses: list of dicts with the s_t_expenses_failed column values.
+        """
+        return self.insert_expense_batches([(expenses, failed_expenses)])
+
+    def insert_expense_batches(
+        self, batches: Iterable[tuple[list[dict], list[dict]]]
+    ) -> Result:
+        """
+        Load a stream of (expenses, failed_expenses) batches in a single transaction.
+
+        Batches are consumed one at a time, so a generator producing them chunk by
+        chunk keeps memory bounded. Either every batch is stored or none is.
+        The months of the stored expenses are queued for the next gold refresh.
+        """
+        total_expenses = 0
+        total_failed_expenses = 0
+        months = set()
+
+        try:
+            with self.db_handler.get_db_session() as session:
+                for expenses, failed_expenses in batches:
+                    if expenses:
+                        session.execute(insert(Expense), expenses)
+                        months.update(
+                            expense["transaction_date"].replace(day=1)
+                            for expense in expenses
+                        )
+                    if failed_expenses:
+                        session.execute(insert(FailedExpense), failed_expenses)
+
+                    total_expenses += len(expenses)
+                    total_failed_expenses += len(failed_expenses)
+
+                if months:
+                    self._queue_gold_refresh(session, months)
+        except Exception as e:
+            return Result(
+                success=False,
+                message=f"An error occurred while inserting data: {e}",
+            )
+
+        return Result(
+            success=True,
+            message=f"Inserted {total_expenses} valid and {total_failed_expenses} failed rows.",
+            data={"expenses": total_expenses, "failed_expenses": total_failed_expenses},
+        )
+
+    @staticmethod
+    def _queue_gold_refresh(session, months: set) -> None:
+        """
+        Record the months touched by a file for the next gold run.
+        They are inserted once, at the end of the load and in sorted order, so
+        files loaded in parallel lock the same months in the same order.
+        """
+        session.execute(
+            insert(GoldRefreshMonth)
+            .values([{"transaction_month": month} for month in sorted(months)])
+            .on_conflict_do_nothing(index_elements=["transaction_month"])
+        )
+
+    def get_transfer_counterparts(
+        self, candidates: pd.DataFrame, exclude_file_id: Optional[str] = None
+    ) -> Result:
+        """
+        Find loaded incoming expenses matching the given (transaction_date, abs_amount) pairs.
+        The lookup is served by the (transaction_date, abs(amount)) index on s_t_expenses.
+
+        Parameters:
+        - candidates: DataFrame with transaction_date (date) and abs_amount columns.
+        - exclude_file_id: file whose own rows must not be matched.
+        """
+        pairs = [
+            (row.transaction_date, Decimal(str(row.abs_amount)))
+            for row in candidates.itertuples(index=False)
+        ]
+        columns = ["transaction_date", "abs_amount", "account"]
+
+        try:
+            with self.db_handler.get_db_session() as session:
+                statement = select(
+                    Expense.transaction_date,
+                    func.abs(Expense.amount),
+                    Expense.account,
+                ).where(
+                    tuple_(Expense.transaction_date, func.abs(Expense.amount)).in_(pairs),
+                    Expense.amount > 0,
+                )
+                if exclude_file_id is not None:
+                    statement = statement.where(Expense.file_id != exclude_file_id)
+
+                rows = session.execute(statement).all()
+        except Exception as e:
+            return Result(
+                success=False,
+                message=f"An error occurred while looking up transfer counterparts: {e}",
+            )
+
+        counterparts = pd.DataFrame(rows, columns=columns)
+        counterparts["abs_amount"] = pd.to_numeric(counterparts["abs_amount"]).round(2)
+        return Result(success=True, data=counterparts)
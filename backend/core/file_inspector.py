@@ -0,0 +1,100 @@
+"""
+This module provides the single-pass inspection of an uploaded file:
+    - SHA-224 checksum, the same digest as Files.generate_checksum.
+    - CSV header and number of data rows, quoted newlines included.
+    - Encoding check against the file configuration.
+The file is read once, in memoryview chunks, and the results are reused by
+the whole bronze stage.
+Usage example:
+    inspection = inspect_file(file_content, encoding="utf-8", delimiter=",")
+"""
+
+import codecs
+import csv
+import hashlib
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+@dataclass
+class FileInspection:
+    """
+    Results of the inspection of a file.
+    """
+
+    checksum: str
+    header: Optional[list[str]]
+    number_rows: int
+    encoding_error: Optional[str] = None
+    parsing_error: Optional[str] = None
+
+
+def inspect_file(
+    file_content: bytes,
+    encoding: str,
+    delimiter: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> FileInspection:
+    """
+    Computes the checksum, header, data row count and encoding check of a
+    CSV file in one pass. Blank lines are not counted as rows.
+    """
+    hasher = hashlib.sha224()
+    decoder = codecs.getincrementaldecoder(encoding)()
+    view = memoryview(file_content)
+    errors = {}
+
+    def lines() -> Iterator[str]:
+        pending = ""
+        for start in range(0, len(view), chunk_size):
+            chunk = view[start:start + chunk_size]
+            hasher.update(chunk)
+
+            # after a decoding error the rest is only hashed
+            if "encoding" in errors:
+                continue
+            try:
+                text = pending + decoder.decode(chunk)
+            except UnicodeDecodeError as e:
+                errors["encoding"] = str(e)
+                continue
+
+            *complete, pending = text.split("\n")
+            for line in complete:
+                yield line + "\n"
+
+        if "encoding" not in errors:
+            try:
+                pending += decoder.decode(b"", final=True)
+            except UnicodeDecodeError as e:
+                errors["encoding"] = str(e)
+                return
+            if pending:
+                yield pending
+
+    line_iterator = lines()
+    header = None
+    number_rows = 0
+
+    try:
+        reader = csv.reader(line_iterator, delimiter=delimiter)
+        header = next(reader, None)
+        for row in reader:
+            if row:
+                number_rows += 1
+    except csv.Error as e:
+        errors["parsing"] = str(e)
+
+    # make sure the whole file was hashed
+    for _ in line_iterator:
+        pass
+
+    return FileInspection(
+        checksum=hasher.hexdigest(),
+        header=header,
+        number_rows=number_rows,
+        encoding_error=errors.get("encoding"),
+        parsing_error=errors.get("parsing"),
+    )
@@ -2,15 +2,42 @@
 This module provides a class `KDriveHandler`:
     - Handles authentication.
     - Handles files actions like upload, delete, and download.
+    - Uploads in chunks through an upload session and downloads as a stream,
+      so memory stays flat whatever the file size.
+    - Keeps a pooled HTTP session, retries 429/5xx with exponential backoff
+      and records the latency of every call.
 Classes:
     KDriveHandler: Handles authentication and files actions.
 Usage example:
+    drive_handler = KDriveHandler(get_settings())
+    result = drive_handler.download_file(file_id)
+    with result.data as file_content:
+        df = pd.read_csv(file_content)
 """
 
-import io
+import hashlib
+import math
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Union
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from backend.core.types import Result
 
+# kDrive accepts chunks between 1 MiB and 1 GiB, the last chunk can be smaller
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+# downloads larger than this are spooled to disk
+DEFAULT_SPOOL_SIZE = 32 * 1024 * 1024
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 60
+DEFAULT_POOL_SIZE = 10
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 1
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
 
 class KDriveHandler:
     """Handles authentication and files upload to Infomaniak KDrive"""
@@ -21,47 +48,204 @@ class KDriveHandler:
         self.drive_id = self.config.kdrive.get("drive_id")
         self.directory_id = self.config.kdrive.get("directory_id")
         self.token = self.config.kdrive.get("token")
+        self.chunk_size = self.config.kdrive.get("chunk_size", DEFAULT_CHUNK_SIZE)
+        self.spool_size = self.config.kdrive.get("spool_size", DEFAULT_SPOOL_SIZE)
+        self.timeout = (
+            self.config.kdrive.get("connect_timeout", DEFAULT_CONNECT_TIMEOUT),
+            self.config.kdrive.get("read_timeout", DEFAULT_READ_TIMEOUT),
+        )
+        self.pool_size = self.config.kdrive.get("pool_size", DEFAULT_POOL_SIZE)
+        self.session = self._create_session(Retry.DEFAULT_ALLOWED_METHODS)
+        # chunk uploads are POSTs that are safe to repeat: a chunk is
+        # identified by its number and replaces a previous copy
+        self.chunk_session = self._create_session(
+            Retry.DEFAULT_ALLOWED_METHODS | {"POST"}
+        )
+        self._metrics: dict[str, dict] = {}
+        self._metrics_lock = threading.Lock()
 
-    def upload_file(self, file_content, file_metadata) -> Result:
+    def _create_session(self, retry_methods: frozenset) -> requests.Session:
+        """
+        Creates a pooled HTTP session: connections are kept alive, and
+        connection errors and 429/5xx responses are retried with exponential
+        backoff, honouring Retry-After. Requests that may have reached the
+        server are only retried for retry_methods, so starting or finishing
+        an upload session is never sent twice.
         """
-        Uploads a file to Infomaniak KDrive.
+        retry = Retry(
+            total=MAX_ATTEMPTS - 1,
+            backoff_factor=RETRY_BACKOFF_SECONDS,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=retry_methods,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["Authorization"] = f"Bearer {self.token}"
+        return session
+
+    def close(self) -> None:
+        """Closes the pooled connections."""
+        self.session.close()
+        self.chunk_session.close()
+
+    def get_metrics(self) -> dict[str, dict]:
+        """
+        Returns the latency of the calls per operation:
+        calls, errors, total_seconds, max_seconds and avg_seconds.
+        """
+        with self._metrics_lock:
+            return {
+                operation: {
+                    **metrics,
+                    "avg_seconds": metrics["total_seconds"] / metrics["calls"],
+                }
+                for operation, metrics in self._metrics.items()
+            }
+
+    @contextmanager
+    def _timed(self, operation: str) -> Iterator[None]:
+        """Records the duration of the wrapped call, retries included."""
+        start = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._metrics_lock:
+                metrics = self._metrics.setdefault(
+                    operation,
+                    {"calls": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0},
+                )
+                metrics["calls"] += 1
+                metrics["errors"] += failed
+                metrics["total_seconds"] += elapsed
+                metrics["max_seconds"] = max(metrics["max_seconds"], elapsed)
+
+    def upload_file(
+        self, file_content: Union[bytes, BinaryIO], file_metadata: dict
+    ) -> Result:
+        """
+        Uploads a file to Infomaniak KDrive through an upload session.
+        The file is sent chunk by chunk, a failed chunk is retried on its
+        own without sending the previous chunks again.
 
         Args:
-            uploaded_file (UploadedFile): The uploaded file object.
+            file_content (bytes | BinaryIO): The file content or a binary file object.
+            file_metadata (dict): file_name and file_size of the file.
 
         Returns:
             Result: Uploaded file ID if successful, else None.
         """
+        session_url = f"{self.base_url}/3/drive/{self.drive_id}/upload/session"
+        total_chunks = max(1, math.ceil(file_metadata["file_size"] / self.chunk_size))
 
         try:
-            response = requests.post(
-                f"{self.base_url}/3/drive/{self.drive_id}/upload",
-                params={
-                    "total_size": file_metadata["file_size"],
-                    "directory_id": self.directory_id,
-                    "file_name": file_metadata["file_name"],
-                    "conflict": "version"
-                },
-                headers={
-                    "Authorization": f"Bearer {self.token}",
-                    "Content-Type": "application/json",
-                },
-                data=file_content
+            with self._timed("upload_start"):
+                response = self.session.post(
+                    f"{session_url}/start",
+                    json={
+                        "conflict": "version",
+                        "directory_id": self.directory_id,
+                        "file_name": file_metadata["file_name"],
+                        "total_size": file_metadata["file_size"],
+                        "total_chunks": total_chunks,
+                    },
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+            upload_session = response.json().get("data")
+        except requests.RequestException as e:
+            return Result(
+                success=False,
+                message=f"An error occurred while starting the upload session: {e}",
             )
 
-            response.raise_for_status()
-            file_id = response.json().get("data").get("id")
+        if not upload_session or not upload_session.get("token"):
             return Result(
-                success=True,
-                message="File uploaded successfully.",
-                data=file_id,
+                success=False,
+                message=f"kDrive did not start the upload session: {response.text}",
             )
+
+        # chunks can be sent to a dedicated upload host
+        upload_url = upload_session.get("upload_url") or self.base_url
+        upload_token = upload_session.get("token")
+
+        try:
+            for chunk_number, chunk in enumerate(
+                _iter_chunks(file_content, self.chunk_size), start=1
+            ):
+                self._upload_chunk(upload_url, upload_token, chunk_number, chunk)
+
+            with self._timed("upload_finish"):
+                response = self.session.post(
+                    f"{session_url}/{upload_token}/finish",
+                    json={},
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
+            uploaded_file = (response.json().get("data") or {}).get("file") or {}
         except requests.RequestException as e:
+            self._cancel_upload_session(upload_token)
             return Result(
                 success=False,
                 message=f"An error occurred while uploading the file: {e}",
             )
 
+        file_id = uploaded_file.get("id")
+
+        if file_id is None:
+            return Result(
+                success=False,
+                message=f"kDrive did not return the uploaded file: {response.text}",
+            )
+        return Result(
+            success=True,
+            message="File uploaded successfully.",
+            data=file_id,
+        )
+
+    def _upload_chunk(
+        self, upload_url: str, upload_token: str, chunk_number: int, chunk
+    ) -> None:
+        """Sends one chunk of an upload session, the session retries transient failures."""
+        chunk_hash = hashlib.sha256(chunk).hexdigest()
+
+        with self._timed("upload_chunk"):
+            response = self.chunk_session.post(
+                f"{upload_url}/3/drive/{self.drive_id}/upload/session/{upload_token}/chunk",
+                params={
+                    "chunk_number": chunk_number,
+                    "chunk_size": len(chunk),
+                    "chunk_hash": f"sha256:{chunk_hash}",
+                },
+                headers={"Content-Type": "application/octet-stream"},
+                data=chunk,
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+
+    def _cancel_upload_session(self, upload_token: str) -> None:
+        """Cancels an upload session so kDrive discards the chunks already sent."""
+        try:
+            with self._timed("upload_cancel"):
+                self.session.delete(
+                    f"{self.base_url}/3/drive/{self.drive_id}/upload/session/{upload_token}",
+                    timeout=self.timeout,
+                )
+        except requests.RequestException:
+            # the session expires on its own
+            pass
+
     def delete_file(self, file_id: str) -> Result:
         """Delete a file from Infomaniak KDrive.
 
@@ -72,15 +256,13 @@ class KDriveHandler:
             Result: Result object indicating success or failure.
         """
         try:
-            response = requests.delete(
-                f"{self.base_url}/2/drive/{self.drive_id}/files/{file_id}",
-                headers={
-                    "Authorization": f"Bearer {self.token}",
-                    "Content-Type": "application/json",
-                },
-                timeout=10,
-            )
-            response.raise_for_status()
+            with self._timed("delete"):
+                response = self.session.delete(
+                    f"{self.base_url}/2/drive/{self.drive_id}/files/{file_id}",
+                    headers={"Content-Type": "application/json"},
+                    timeout=self.timeout,
+                )
+                response.raise_for_status()
             return Result(success=True, message="File deleted successfully.")
         except requests.RequestException as e:
             return Result(
@@ -90,8 +272,12 @@ class KDriveHandler:
 
     def download_file(self, file_id: str) -> Result:
         """
-        Download file content from Infomaniak KDrive as Zip file.
-        Function returns file content as bytes.
+        Download file content from Infomaniak KDrive as a stream.
+        Function returns a binary file object positioned at the start,
+        kept in memory up to spool_size bytes and spooled to disk above.
+        The caller closes it.
+
+        An interrupted download is resumed from the last byte received.
 
         Args:
             file_id (str): The ID of the file to download.
@@ -99,28 +285,72 @@ class KDriveHandler:
         Returns:
             Result: Result object indicating success or failure.
         """
-        try:
-            response = requests.get(
-                f"{self.base_url}/2/drive/{self.drive_id}/files/{file_id}/download",
-                headers={
-                    "Authorization": f"Bearer {self.token}",
-                    "Content-Type": "application/json",
-                },
-                timeout=10,
-                allow_redirects=True,
-            )
-            response.raise_for_status()
+        file_content = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
 
-            # convert zip file content to bytes
-            file_content = io.BytesIO(response.content)
+        try:
+            with self._timed("download"):
+                for attempt in range(1, MAX_ATTEMPTS + 1):
+                    try:
+                        self._download_into(file_id, file_content)
+                        break
+                    except (
+                        requests.ConnectionError,
+                        requests.exceptions.ChunkedEncodingError,
+                    ):
+                        # the session only retries until the headers are received
+                        if attempt == MAX_ATTEMPTS:
+                            raise
+                        time.sleep(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
 
+            file_content.seek(0)
             return Result(
                 success=True,
                 message="File downloaded successfully.",
-                data=file_content.getvalue(),
+                data=file_content,
             )
         except requests.RequestException as e:
+            file_content.close()
             return Result(
                 success=False,
                 message=f"An error occurred while downloading the file: {e}",
             )
+
+    def _download_into(self, file_id: str, file_content: BinaryIO) -> None:
+        """Streams the file into file_content, from the bytes it already holds."""
+        headers = {"Content-Type": "application/json"}
+        received = file_content.tell()
+        if received:
+            headers["Range"] = f"bytes={received}-"
+
+        with self.session.get(
+            f"{self.base_url}/2/drive/{self.drive_id}/files/{file_id}/download",
+            headers=headers,
+            timeout=self.timeout,
+            allow_redirects=True,
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+
+            # the server ignored the range: start over
+            if received and response.status_code != 206:
+                file_content.seek(0)
+                file_content.truncate()
+
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                file_content.write(chunk)
+
+
+def _iter_chunks(
+    file_content: Union[bytes, BinaryIO], chunk_size: int
+) -> Iterator[Union[memoryview, bytes]]:
+    """Yields the file in chunks, memoryview slices for bytes to avoid copies."""
+    if hasattr(file_content, "read"):
+        while True:
+            chunk = file_content.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        view = memoryview(file_content)
+        for start in range(0, max(len(view), 1), chunk_size):
+            yield view[start:start + chunk_size]
@@ -0,0 +1,129 @@
+"""
+This module provides the application settings without depending on Streamlit.
+Settings are read from, in order of precedence:
+    - Values injected with `configure`, e.g. the Streamlit secrets in the frontend.
+    - Environment variables EXPENSES__<SECTION>__<KEY>, e.g. EXPENSES__KDRIVE__TOKEN.
+      DATABASE_URL is also accepted for the database URL.
+    - A TOML file, EXPENSES_SETTINGS_FILE or .streamlit/secrets.toml by default.
+      It is not read when settings were injected, they come from the same file.
+Usage example:
+    settings = get_settings()
+    database_url = settings.database.database_url
+"""
+
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Mapping, Optional
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11
+    import tomli as tomllib
+
+DEFAULT_SETTINGS_FILE = ".streamlit/secrets.toml"
+ENV_PREFIX = "EXPENSES__"
+INT_PATTERN = re.compile(r"-?(0|[1-9][0-9]*)")
+FLOAT_PATTERN = re.compile(r"-?(0|[1-9][0-9]*)\.[0-9]+")
+
+_injected: Optional[dict] = None
+_settings: Optional["Settings"] = None
+_lock = threading.Lock()
+
+
+class Settings(dict):
+    """Nested settings mapping, sections are also readable as attributes."""
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError as e:
+            raise AttributeError(f"Setting '{name}' is not defined.") from e
+
+    def __getitem__(self, key: str) -> Any:
+        value = super().__getitem__(key)
+        return Settings(value) if isinstance(value, Mapping) else value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+
+def configure(settings: Mapping) -> None:
+    """Injects settings, they take precedence over environment variables and files."""
+    global _injected, _settings
+    injected = _to_dict(settings)
+    with _lock:
+        if injected != _injected:
+            _injected = injected
+            _settings = None
+
+
+def get_settings() -> Settings:
+    """Returns the merged settings, loaded once per process."""
+    global _settings
+    with _lock:
+        if _settings is None:
+            settings = _read_settings_file() if _injected is None else {}
+            _merge(settings, _read_environment())
+            if _injected is not None:
+                _merge(settings, _injected)
+            _settings = Settings(settings)
+        return _settings
+
+
+def _read_settings_file() -> dict:
+    path = Path(os.environ.get("EXPENSES_SETTINGS_FILE", DEFAULT_SETTINGS_FILE))
+
+    if not path.is_file():
+        return {}
+
+    with path.open("rb") as settings_file:
+        return tomllib.load(settings_file)
+
+
+def _read_environment() -> dict:
+    settings: dict = {}
+
+    if "DATABASE_URL" in os.environ:
+        settings.setdefault("database", {})["database_url"] = os.environ["DATABASE_URL"]
+
+    for name, value in os.environ.items():
+        if not name.startswith(ENV_PREFIX):
+            continue
+        *sections, key = name[len(ENV_PREFIX):].lower().split("__")
+        target = settings
+        for section in sections:
+            target = target.setdefault(section, {})
+        target[key] = _parse_value(value)
+
+    return settings
+
+
+def _parse_value(value: str) -> Any:
+    """
+    Environment values are strings, convert booleans and plain decimal numbers.
+    IDs and tokens with leading zeros, and values like "nan" or "1e5", stay strings.
+    """
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    if INT_PATTERN.fullmatch(value):
+        return int(value)
+    if FLOAT_PATTERN.fullmatch(value):
+        return float(value)
+    return value
+
+
+def _merge(target: dict, source: dict) -> None:
+    for key, value in source.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+
+
+def _to_dict(mapping: Mapping) -> dict:
+    return {
+        key: _to_dict(value) if isinstance(value, Mapping) else value
+        for key, value in mapping.items()
+    }
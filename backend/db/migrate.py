@@ -1,15 +1,33 @@
 import os
 import sys
-from sqlalchemy import inspect
+from sqlalchemy import func, inspect
 
 sys.path.append(os.getcwd())
 
 from backend.core.database_handler import DatabaseHandler
-from backend.models.models import Base
+from backend.ingestion.gold.registry import generator_registry
+from backend.models.models import Base, PipelineConfiguration
 
 # define a db handler
 db_handler = DatabaseHandler()
 
+# gold generators shipped with the code:
+# (target table, module path, class name, class name of the generator it depends on)
+GOLD_GENERATORS = [
+    (
+        "g_t_monthly_kpis",
+        "backend.ingestion.gold.g_t_monthly_kpis",
+        "MonthlyKpisGenerator",
+        "MonthlySummaryGenerator",
+    ),
+    (
+        "g_t_category_vs_budget",
+        "backend.ingestion.gold.g_t_category_vs_budget",
+        "CategoryVsBudgetGenerator",
+        "CategoryExpenseSummaryGenerator",
+    ),
+]
+
 
 def migrate() -> None:
     """
@@ -40,7 +58,56 @@ def migrate() -> None:
             db_handler.add_column(fq_table, col, table.columns[col].type, table.columns[col].nullable)
             print(f"Added column {col} to {fq_table}")
         
+        # create missing indexes
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
         # drop extra columns: TBD - requires careful handling
 
+    register_gold_generators()
+
+
+def register_gold_generators() -> None:
+    """
+    Register the shipped gold generators missing from g_t_pipeline_config and
+    backfill their table once, incremental gold runs keep it up to date afterwards.
+    A generator is only registered once the generator it depends on is.
+    """
+    with db_handler.get_db_session() as session:
+        for target_table, module_path, class_name, dependency_class in GOLD_GENERATORS:
+            if session.query(PipelineConfiguration).filter_by(target_table=target_table).first():
+                continue
+
+            dependency = (
+                session.query(PipelineConfiguration)
+                .filter_by(class_name=dependency_class)
+                .first()
+            )
+            # without its dependency it would run alongside it on stale data
+            if dependency is None:
+                print(
+                    f"Skipped gold generator {class_name}: register {dependency_class} "
+                    "first, then run the migration again"
+                )
+                continue
+
+            session.add(
+                PipelineConfiguration(
+                    target_table=target_table,
+                    module_path=module_path,
+                    class_name=class_name,
+                    active=True,
+                    dependency=dependency.id,
+                    last_run=func.now(),
+                )
+            )
+
+            # the generator commits the registration together with the backfill
+            generator_registry.resolve(module_path, class_name)().run(session)
+            print(f"Registered and backfilled gold generator {class_name}")
+
+    generator_registry.invalidate()
+
+
 if __name__ == "__main__":
     migrate()
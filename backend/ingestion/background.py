@@ -0,0 +1,97 @@
+"""
+This module runs the ingestion pipeline of files in background threads, so
+the frontend stays responsive while files are processed.
+Files are marked IN_PROGRESS as soon as they are submitted, the pipeline
+reports its stage and rows processed on cfg_t_files, chunk by chunk, and
+files whose pipeline fails are marked FAILED with the error message.
+Files left IN_PROGRESS by a previous process are reset when the executor
+is created. The gold stage of concurrent runs is serialized by the runner.
+Usage example:
+    executor = PipelineExecutor()
+    result = executor.submit(file_id, file_config_id)
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+from backend.core.file_handler import FileHandler
+from backend.core.types import Result
+from backend.ingestion.pipeline import get_silver_chunksize, pipeline
+from backend.models.models import FileStatusEnum, ProcessingStageEnum
+
+DEFAULT_BACKGROUND_WORKERS = 4
+
+
+class PipelineExecutor:
+    """Runs the ingestion pipeline of files in a pool of background threads"""
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_BACKGROUND_WORKERS,
+        chunksize: Optional[int] = None,
+    ) -> None:
+        self.file_handler = FileHandler()
+        # progress is reported after every chunk
+        self.chunksize = chunksize or get_silver_chunksize()
+
+        # no pipeline runs yet in this process: IN_PROGRESS files were interrupted
+        result = self.file_handler.recover_interrupted_files()
+        if not result.success:
+            print(result.message)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="pipeline"
+        )
+        self._futures: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, file_id: str, file_config_id: int) -> Result:
+        """Marks the file IN_PROGRESS and queues its pipeline."""
+        with self._lock:
+            if file_id in self._futures:
+                return Result(success=False, message="File is already being processed.")
+
+            result = self.file_handler.update_file_attributes(
+                [file_id],
+                {
+                    "file_status_id": FileStatusEnum.IN_PROGRESS.value,
+                    "processing_stage": ProcessingStageEnum.QUEUED.value,
+                    "rows_processed": None,
+                    "error_message": None,
+                },
+            )
+            if not result.success:
+                return result
+
+            self._futures[file_id] = self._executor.submit(
+                self._run, file_id, file_config_id
+            )
+
+        return Result(success=True, message="Processing started.")
+
+    def running(self) -> set[str]:
+        """IDs of the files queued or being processed."""
+        with self._lock:
+            return set(self._futures)
+
+    def _run(self, file_id: str, file_config_id: int) -> Result:
+        try:
+            result = pipeline(file_id, file_config_id, chunksize=self.chunksize)
+        except Exception as e:
+            result = Result(success=False, message=str(e))
+
+        try:
+            if not result.success:
+                # the silver pipeline sets the final status of the files it loaded
+                self.file_handler.update_file_attributes(
+                    [file_id],
+                    {"file_status_id": FileStatusEnum.FAILED.value},
+                    file_status=FileStatusEnum.IN_PROGRESS,
+                )
+                self.file_handler.update_file_attributes(
+                    [file_id], {"error_message": result.message.strip()}
+                )
+        finally:
+            with self._lock:
+                self._futures.pop(file_id, None)
+
+        return result
@@ -0,0 +1,258 @@
+"""
+This module contains the task to load uploaded files to the bronze layer.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from backend.core.types import Result
+from backend.core.kdrive_handler import KDriveHandler
+from backend.core.file_handler import FileHandler
+from backend.core.file_cache import FileCache
+from backend.core.file_inspector import FileInspection, inspect_file
+from backend.models.models import FileConfiguration, Files, FileStatusEnum
+from backend.validation.base_validator import FileValidatorPipeline
+from backend.validation.validators.file_validators import (
+    ChecksumValidator,
+    SchemaValidator,
+)
+
+DEFAULT_UPLOAD_CONCURRENCY = 4
+
+
+def prepare_upload(
+    file_name: str, file_content: bytes, file_handler: FileHandler
+) -> Result:
+    """
+    Resolves the file configuration from the file name and inspects the file
+    in a single pass. Returns the configuration and the inspection.
+    """
+    determine_config_id_result = file_handler.determine_file_config_id(file_name)
+
+    if not determine_config_id_result.success:
+        return Result(
+            success=False,
+            message=f"Failed to determine file config ID: {determine_config_id_result.message}",
+        )
+
+    get_config_result = file_handler.get_file_config(determine_config_id_result.data)
+
+    if not get_config_result.success:
+        return Result(
+            success=False,
+            message=f"Failed to get file config: {get_config_result.message}",
+        )
+
+    file_config = get_config_result.data
+
+    # a bad encoding or delimiter in the configuration fails only this file
+    try:
+        inspection = inspect_file(
+            file_content, file_config.encoding, file_config.delimiter
+        )
+    except Exception as e:
+        return Result(
+            success=False,
+            message=f"Failed to inspect the file with its configuration: {e}",
+        )
+
+    return Result(success=True, data=(file_config, inspection))
+
+
+def bronze_pipeline(
+    file_name: str,
+    file_content: bytes,
+    drive_handler: KDriveHandler,
+    file_handler: FileHandler,
+    file_config: Optional[FileConfiguration] = None,
+    inspection: Optional[FileInspection] = None,
+    existing_checksums: Optional[set[str]] = None,
+    file_cache: Optional[FileCache] = None,
+) -> Result:
+    """
+    Task to load an uploaded file to the bronze layer.
+    This task:
+    - Determines the file configuration from the file name
+    - Inspects the file: checksum, header, row count and encoding
+    - Validates: checksum is unique, schema matches the configuration
+    - Uploads the file to kDrive
+    - Stores the file metadata in the database
+    - Keeps a local copy in file_cache, if given, for the silver stage
+    If a step fails, the steps already done are rolled back.
+
+    The configuration, inspection and the checksums already stored can be
+    passed when they were computed for the whole upload batch.
+    """
+    rollback_actions = []
+
+    try:
+        # STEP 1: Determine the file configuration and inspect the file
+        if file_config is None or inspection is None:
+            prepare_result = prepare_upload(file_name, file_content, file_handler)
+
+            if not prepare_result.success:
+                raise RuntimeError(prepare_result.message)
+
+            file_config, inspection = prepare_result.data
+
+        file_metadata = {
+            "file_name": file_name,
+            "file_size": len(file_content),
+            "file_config_id": file_config.config_id,
+            "checksum": inspection.checksum,
+            "inspection": inspection,
+        }
+
+        # STEP 2: Setting up validators
+        validators = [
+            ChecksumValidator(existing_checksums),
+            SchemaValidator(
+                file_config=file_config,
+            ),
+        ]
+        validation_pipeline = FileValidatorPipeline(validators)
+
+        # STEP 3: Running validators
+        validations_result = validation_pipeline.run_validations(
+            file_content, file_metadata
+        )
+        if not validations_result.success:
+            raise RuntimeError(
+                f"File didn't pass validations: {validations_result.message}"
+            )
+
+        # STEP 4: Upload to kDrive
+        file_upload_result = drive_handler.upload_file(file_content, file_metadata)
+
+        if not file_upload_result.success:
+            raise Exception(f"Error while uploading file: {file_upload_result.message}")
+
+        # Register rollback: if error occurs later
+        # Delete the uploaded file
+        rollback_actions.append(
+            lambda: drive_handler.delete_file(file_upload_result.data)
+        )
+
+        # STEP 5: Store metadata in database
+        expenses_file = Files(
+            file_id=file_upload_result.data,
+            file_source=file_metadata["file_name"].split("_")[0],
+            file_name=file_metadata["file_name"],
+            file_size=file_metadata["file_size"],
+            number_rows=inspection.number_rows,
+            checksum=file_metadata["checksum"],
+            file_status_id=FileStatusEnum.UPLOADED.value,
+            file_config_id=file_metadata["file_config_id"],
+        )
+
+        upload_metadata_result = file_handler.upload_file_metadata(expenses_file)
+
+        if not upload_metadata_result.success:
+            raise Exception(f"{upload_metadata_result.message}")
+
+        # STEP 6: Keep a local copy, the silver stage falls back to kDrive without it
+        if file_cache is not None:
+            cache_result = file_cache.put(inspection.checksum, file_content)
+            if not cache_result.success:
+                print(f"{file_name}: {cache_result.message}")
+
+        return Result(
+            success=True, message=f"File {file_name} uploaded successfully."
+        )
+
+    except Exception as e:
+        # trigger rollback actions
+        rollback_errors = []
+        for action in reversed(rollback_actions):
+            try:
+                action()
+            except Exception as rollback_error:
+                rollback_errors.append(f"Rollback failed: {rollback_error}")
+
+        return Result(
+            success=False,
+            message="\n".join([f"{file_name}: {e}", *rollback_errors]),
+        )
+
+
+def run_bronze_pipelines(
+    files: list[tuple[str, bytes]],
+    drive_handler: KDriveHandler,
+    file_handler: FileHandler,
+    max_workers: int = DEFAULT_UPLOAD_CONCURRENCY,
+    file_cache: Optional[FileCache] = None,
+) -> list[Result]:
+    """
+    Loads several uploaded files to the bronze layer at the same time.
+    Each file keeps its own rollback, results are returned in input order.
+
+    Before any kDrive or per-file database work, all files are resolved to
+    their configuration and inspected in parallel, duplicates within the
+    batch are rejected and the checksums already stored are fetched with a
+    single query.
+
+    Parameters:
+    - files: list of (file name, file content) tuples.
+    - max_workers: maximum number of files processed concurrently.
+    """
+    results: list[Optional[Result]] = [None] * len(files)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # hashlib releases the GIL, large files are inspected in parallel
+        prepare_results = list(
+            executor.map(
+                lambda file: prepare_upload(file[0], file[1], file_handler), files
+            )
+        )
+
+        prepared = {}
+        first_seen: dict[str, str] = {}
+
+        for index, prepare_result in enumerate(prepare_results):
+            file_name = files[index][0]
+            if not prepare_result.success:
+                results[index] = Result(
+                    success=False, message=f"{file_name}: {prepare_result.message}"
+                )
+                continue
+
+            checksum = prepare_result.data[1].checksum
+            if checksum in first_seen:
+                results[index] = Result(
+                    success=False,
+                    message=f"{file_name}: ⚠️ Same content as {first_seen[checksum]} in this upload.",
+                )
+                continue
+
+            first_seen[checksum] = file_name
+            prepared[index] = prepare_result.data
+
+        if not prepared:
+            return results
+
+        existing_result = file_handler.get_existing_checksums(sorted(first_seen))
+        if not existing_result.success:
+            for index in prepared:
+                results[index] = Result(
+                    success=False,
+                    message=f"{files[index][0]}: {existing_result.message}",
+                )
+            return results
+
+        futures = {
+            index: executor.submit(
+                bronze_pipeline,
+                *files[index],
+                drive_handler,
+                file_handler,
+                file_config=file_config,
+                inspection=inspection,
+                existing_checksums=existing_result.data,
+                file_cache=file_cache,
+            )
+            for index, (file_config, inspection) in prepared.items()
+        }
+
+        for index, future in futures.items():
+            results[index] = future.result()
+
+    return results
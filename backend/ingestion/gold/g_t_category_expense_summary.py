@@ -1,37 +1,38 @@
 from backend.models.models import Expense, CategoryExpenses
-from sqlalchemy import func
+from backend.ingestion.gold.incremental import in_months
+from sqlalchemy import func, delete, select
 from sqlalchemy.dialects.postgresql import insert
 
 class CategoryExpenseSummaryGenerator:
-    def run(self, db_session) -> None:
+    def run(self, db_session, months=None) -> None:
+
+        month = func.date_trunc('month', Expense.transaction_date)
 
         # Aggregate data grouped by month and category
-        monthly_data = db_session.query(
-            func.date_trunc('month', Expense.transaction_date).label('month'),
+        monthly_data = select(
+            month,
             Expense.category,
-            func.sum(Expense.amount).label('total_expenses')
-        ).group_by(
-            func.date_trunc('month', Expense.transaction_date),
-            Expense.category
-        ).all()
-
-        for data in monthly_data:
-            summary_data = {
-                'transaction_month': data.month,
-                'category': data.category,
-                'total_expenses': data.total_expenses or 0,
-                'inserted_datetime': func.now()
-            }
+            func.coalesce(func.sum(Expense.amount), 0),
+            func.now()
+        ).group_by(month, Expense.category)
 
-            # insert or update the monthly summary
-            # Use the insert statement with on_conflict_do_update
-            # to handle conflicts based on the transaction_month
-            # and update the existing record
-            statement = insert(CategoryExpenses).values(summary_data)
-            statement = statement.on_conflict_do_update(
-                index_elements=['transaction_month', 'category'],
-                set_=summary_data
+        # Only refresh the given months, categories left without data are removed
+        if months is not None:
+            monthly_data = monthly_data.where(in_months(Expense.transaction_date, months))
+            db_session.execute(
+                delete(CategoryExpenses).where(CategoryExpenses.transaction_month.in_(months))
             )
-            db_session.execute(statement)
 
-        db_session.commit()
\ No newline at end of file
+        # insert or update the monthly summary in a single statement
+        # Use INSERT ... SELECT with on_conflict_do_update
+        # to handle conflicts based on the transaction_month
+        # and category and update the existing record
+        columns = ['transaction_month', 'category', 'total_expenses', 'inserted_datetime']
+        statement = insert(CategoryExpenses).from_select(columns, monthly_data)
+        statement = statement.on_conflict_do_update(
+            index_elements=['transaction_month', 'category'],
+            set_={column: statement.excluded[column] for column in columns[2:]}
+        )
+        db_session.execute(statement)
+
+        db_session.commit()
@@ -0,0 +1,49 @@
+from backend.models.models import CategoryBudget, CategoryExpenses, CategoryVsBudget
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+class CategoryVsBudgetGenerator:
+    def run(self, db_session, months=None) -> None:
+
+        # Budget valid in the month: the latest one starting on or before it
+        budget = (
+            select(CategoryBudget.monthly_budget)
+            .where(
+                CategoryBudget.category == CategoryExpenses.category,
+                CategoryBudget.valid_from <= CategoryExpenses.transaction_month,
+            )
+            .order_by(CategoryBudget.valid_from.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+
+        # Join the category totals of the month to their budget
+        # Spending is stored negative in silver, the spend is positive like the budget
+        budget_data = select(
+            CategoryExpenses.transaction_month,
+            CategoryExpenses.category,
+            -CategoryExpenses.total_expenses,
+            budget,
+            func.now()  # Use func.now() to get the current timestamp
+        )
+
+        # Only refresh the given months, categories left without data are removed
+        if months is not None:
+            budget_data = budget_data.where(CategoryExpenses.transaction_month.in_(months))
+            db_session.execute(
+                delete(CategoryVsBudget).where(CategoryVsBudget.transaction_month.in_(months))
+            )
+
+        # insert or update the category vs budget summary in a single statement
+        # Use INSERT ... SELECT with on_conflict_do_update
+        # to handle conflicts based on the transaction_month
+        # and category and update the existing record
+        columns = ['transaction_month', 'category', 'total_expenses', 'budget', 'inserted_datetime']
+        statement = insert(CategoryVsBudget).from_select(columns, budget_data)
+        statement = statement.on_conflict_do_update(
+            index_elements=['transaction_month', 'category'],
+            set_={column: statement.excluded[column] for column in columns[2:]}
+        )
+        db_session.execute(statement)
+
+        db_session.commit()
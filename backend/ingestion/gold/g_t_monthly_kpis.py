@@ -0,0 +1,81 @@
+from backend.models.models import MonthlyExpenses, MonthlyKpis
+from backend.ingestion.gold.incremental import next_month
+from sqlalchemy import Date, Interval, case, delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+class MonthlyKpisGenerator:
+    def run(self, db_session, months=None) -> None:
+
+        order = {'order_by': MonthlyExpenses.transaction_month}
+
+        # Read the previous row of each total with LAG
+        # The window runs over the whole monthly summary, one row per month
+        lagged = select(
+            MonthlyExpenses.transaction_month,
+            MonthlyExpenses.total_expenses,
+            MonthlyExpenses.total_earnings,
+            MonthlyExpenses.total_savings,
+            func.lag(MonthlyExpenses.transaction_month).over(**order).label('previous_month'),
+            func.lag(MonthlyExpenses.total_expenses).over(**order).label('previous_total_expenses'),
+            func.lag(MonthlyExpenses.total_earnings).over(**order).label('previous_total_earnings'),
+            func.lag(MonthlyExpenses.total_savings).over(**order).label('previous_total_savings'),
+        ).subquery()
+
+        # The previous row only counts if it is the previous calendar month
+        is_previous_month = lagged.c.previous_month == (
+            lagged.c.transaction_month - func.make_interval(0, 1, type_=Interval)
+        ).cast(Date)
+
+        def previous(column):
+            return case((is_previous_month, column), else_=None)
+
+        # Change in percent, 0 when the previous total is 0
+        def change(column, previous_column):
+            return case(
+                (~is_previous_month | previous_column.is_(None), None),
+                (previous_column == 0, 0),
+                else_=func.round((column - previous_column) / previous_column, 4) * 100
+            )
+
+        kpis_data = select(
+            lagged.c.transaction_month,
+            lagged.c.total_expenses,
+            lagged.c.total_earnings,
+            lagged.c.total_savings,
+            previous(lagged.c.previous_total_expenses),
+            previous(lagged.c.previous_total_earnings),
+            previous(lagged.c.previous_total_savings),
+            change(lagged.c.total_expenses, lagged.c.previous_total_expenses),
+            change(lagged.c.total_earnings, lagged.c.previous_total_earnings),
+            change(lagged.c.total_savings, lagged.c.previous_total_savings),
+            func.now()  # Use func.now() to get the current timestamp
+        )
+
+        # Only refresh the given months and the months following them,
+        # whose previous values changed, months left without data are removed
+        if months is not None:
+            months = sorted({*months, *(next_month(month) for month in months)})
+            kpis_data = kpis_data.where(lagged.c.transaction_month.in_(months))
+            db_session.execute(
+                delete(MonthlyKpis).where(MonthlyKpis.transaction_month.in_(months))
+            )
+
+        # insert or update the monthly KPIs in a single statement
+        # Use INSERT ... SELECT with on_conflict_do_update
+        # to handle conflicts based on the transaction_month
+        # and update the existing record
+        columns = [
+            'transaction_month',
+            'total_expenses', 'total_earnings', 'total_savings',
+            'previous_total_expenses', 'previous_total_earnings', 'previous_total_savings',
+            'expenses_change', 'earnings_change', 'savings_change',
+            'inserted_datetime',
+        ]
+        statement = insert(MonthlyKpis).from_select(columns, kpis_data)
+        statement = statement.on_conflict_do_update(
+            index_elements=['transaction_month'],
+            set_={column: statement.excluded[column] for column in columns[1:]}
+        )
+        db_session.execute(statement)
+
+        db_session.commit()
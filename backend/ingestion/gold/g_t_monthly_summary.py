@@ -1,36 +1,39 @@
 from backend.models.models import Expense, MonthlyExpenses
-from sqlalchemy import func
+from backend.ingestion.gold.incremental import in_months
+from sqlalchemy import func, delete, select
 from sqlalchemy.dialects.postgresql import insert
 
 class MonthlySummaryGenerator:
-    def run(self, db_session) -> None:
+    def run(self, db_session, months=None) -> None:
 
-        # Aggregate data grouped by month
-        monthly_data = db_session.query(
-            func.date_trunc('month', Expense.transaction_date).label('month'),
-            func.sum(Expense.amount).filter(Expense.category == 'Expenses').label('total_expenses'),
-            func.sum(Expense.amount).filter(Expense.category == 'Salary').label('total_earnings'),
-            func.sum(Expense.amount).filter(Expense.category == 'Savings').label('total_savings')
-        ).group_by(func.date_trunc('month', Expense.transaction_date)).all()
+        month = func.date_trunc('month', Expense.transaction_date)
 
-        for data in monthly_data:
-            summary_data = {
-                'transaction_month': data.month,
-                'total_expenses': data.total_expenses or 0,
-                'total_earnings': data.total_earnings or 0,
-                'total_savings': data.total_savings or 0,
-                'inserted_datetime': func.now()  # Use func.now() to get the current timestamp
-            }
+        # Aggregate data grouped by month
+        monthly_data = select(
+            month,
+            func.coalesce(func.sum(Expense.amount).filter(Expense.category == 'Expenses'), 0),
+            func.coalesce(func.sum(Expense.amount).filter(Expense.category == 'Salary'), 0),
+            func.coalesce(func.sum(Expense.amount).filter(Expense.category == 'Savings'), 0),
+            func.now()  # Use func.now() to get the current timestamp
+        ).group_by(month)
 
-            # insert or update the monthly summary
-            # Use the insert statement with on_conflict_do_update
-            # to handle conflicts based on the transaction_month
-            # and update the existing record
-            statement = insert(MonthlyExpenses).values(summary_data)
-            statement = statement.on_conflict_do_update(
-                index_elements=['transaction_month'],
-                set_=summary_data
+        # Only refresh the given months, months left without data are removed
+        if months is not None:
+            monthly_data = monthly_data.where(in_months(Expense.transaction_date, months))
+            db_session.execute(
+                delete(MonthlyExpenses).where(MonthlyExpenses.transaction_month.in_(months))
             )
-            db_session.execute(statement)
 
-        db_session.commit()
\ No newline at end of file
+        # insert or update the monthly summary in a single statement
+        # Use INSERT ... SELECT with on_conflict_do_update
+        # to handle conflicts based on the transaction_month
+        # and update the existing record
+        columns = ['transaction_month', 'total_expenses', 'total_earnings', 'total_savings', 'inserted_datetime']
+        statement = insert(MonthlyExpenses).from_select(columns, monthly_data)
+        statement = statement.on_conflict_do_update(
+            index_elements=['transaction_month'],
+            set_={column: statement.excluded[column] for column in columns[1:]}
+        )
+        db_session.execute(statement)
+
+        db_session.commit()
@@ -1,21 +1,60 @@
-import importlib
 import os
 import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 # This is a workaround to add the project root to the path
 sys.path.append(os.getcwd())
 
+from sqlalchemy import func, update
+from backend.core.database_handler import DatabaseHandler
 from backend.core.types import Result
-from backend.models.models import PipelineConfiguration
+from backend.ingestion.gold.registry import GeneratorRegistry, generator_registry
+from backend.models.models import GoldRefreshMonth, PipelineConfiguration
+
+DEFAULT_GOLD_CONCURRENCY = 4
+
+# one gold run at a time per process: concurrent runs would drain the same
+# refresh months and rewrite the same gold months at the same time
+_run_lock = threading.Lock()
 
 
 class GoldPipelineRunner:
-    def __init__(self, db_session) -> None:
-        self.db = db_session
+    """
+    Runs the active gold generators following the dependency column of
+    g_t_pipeline_config: a generator starts only after the generator it depends
+    on has committed, independent generators run at the same time, each one on
+    its own session.
+    """
+
+    def __init__(
+        self,
+        db_handler: DatabaseHandler,
+        max_workers: int = DEFAULT_GOLD_CONCURRENCY,
+        registry: GeneratorRegistry = generator_registry,
+    ) -> None:
+        self.db_handler = db_handler
+        self.max_workers = max_workers
+        self.registry = registry
 
-    def run(self) -> Result:
+        # fail fast: a bad configuration is reported when the runner is built
+        self.registry.get_active_configs(self.db_handler)
+
+    def run(self, full_refresh: bool = False) -> Result:
+        """
+        Refreshes the gold layer, waiting for any run already in progress.
+        A run started meanwhile picks up the months queued after it.
+        """
+        with _run_lock:
+            return self._run(full_refresh)
+
+    def _run(self, full_refresh: bool) -> Result:
         # fetch all active pipeline configurations
-        configs = self.db.query(PipelineConfiguration).filter_by(active=True).all()
+        try:
+            configs = self.registry.get_active_configs(self.db_handler)
+        except Exception as e:
+            return Result(success=False, message=str(e))
 
         if not configs:
             return Result(
@@ -23,16 +62,107 @@ class GoldPipelineRunner:
                 message="No active pipeline configurations found."
             )
 
-        errors = []
-        for config in configs:
-            try:
-                module = importlib.import_module(config.module_path)
-                generator_class = getattr(module, config.class_name)
-                generator = generator_class()
-                generator.run(self.db)
-            except (ImportError, AttributeError, Exception) as e:
-                errors.append(f"{config.module_path}: {e}")
-        
+        with self.db_handler.get_db_session() as session:
+            # months changed in silver since the last run
+            months = [
+                row.transaction_month
+                for row in session.query(GoldRefreshMonth.transaction_month).all()
+            ]
+
+        if not months and not full_refresh:
+            return Result(success=True, message="No changed months to refresh.")
+
+        timings, errors = self._run_generators(configs, None if full_refresh else months)
+
         if errors:
-            Result(success=False, message="Errors occurred:\n" + "\n".join(errors))
-        return Result(success=True, message="Gold pipeline run completed successfully.")
\ No newline at end of file
+            return Result(
+                success=False,
+                message="Errors occurred:\n" + "\n".join(errors),
+                data=timings,
+            )
+
+        # months queued while running stay for the next run
+        if months:
+            with self.db_handler.get_db_session() as session:
+                session.query(GoldRefreshMonth).filter(
+                    GoldRefreshMonth.transaction_month.in_(months)
+                ).delete(synchronize_session=False)
+
+        return Result(
+            success=True,
+            message="Gold pipeline run completed successfully.",
+            data=timings,
+        )
+
+    def _run_generators(self, configs, months) -> tuple[dict, list]:
+        """
+        Schedules the generators once their dependency succeeded.
+        Returns the duration in seconds per target table and the errors.
+        """
+        active_ids = {config.id for config in configs}
+        # a dependency on an inactive configuration does not block
+        parents = {
+            config.id: config.dependency if config.dependency in active_ids else None
+            for config in configs
+        }
+        pending = {config.id: config for config in configs}
+        succeeded, failed, timings, errors = set(), set(), {}, []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+
+            while pending or running:
+                changed = True
+                while changed:
+                    changed = False
+                    for config_id, config in list(pending.items()):
+                        parent = parents[config_id]
+                        if parent is None or parent in succeeded:
+                            future = executor.submit(self._run_generator, config, months)
+                            running[future] = config
+                            del pending[config_id]
+                        elif parent in failed:
+                            errors.append(
+                                f"{config.module_path}: skipped, dependency {parent} failed."
+                            )
+                            failed.add(config_id)
+                            del pending[config_id]
+                            changed = True
+
+                if not running:
+                    # what is left waits on a dependency cycle
+                    errors.extend(
+                        f"{config.module_path}: skipped, circular dependency."
+                        for config in pending.values()
+                    )
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    config = running.pop(future)
+                    try:
+                        timings[config.target_table] = future.result()
+                        succeeded.add(config.id)
+                    except Exception as e:
+                        errors.append(f"{config.module_path}: {e}")
+                        failed.add(config.id)
+
+        return timings, errors
+
+    def _run_generator(self, config: PipelineConfiguration, months) -> float:
+        """
+        Runs one generator on its own session and records its last run.
+        last_run is written first, in the same transaction as the generator
+        output: the commit of the generator stores both or neither.
+        """
+        generator = self.registry.resolve(config.module_path, config.class_name)()
+
+        start = time.perf_counter()
+        with self.db_handler.get_db_session() as session:
+            session.execute(
+                update(PipelineConfiguration)
+                .where(PipelineConfiguration.id == config.id)
+                .values(last_run=func.now())
+            )
+            generator.run(session, months)
+        return time.perf_counter() - start
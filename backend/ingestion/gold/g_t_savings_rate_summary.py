@@ -1,37 +1,41 @@
 from backend.models.models import MonthlyExpenses, SavingsRate
-from sqlalchemy import func, case
+from sqlalchemy import func, case, delete, select
 from sqlalchemy.dialects.postgresql import insert
 
 class SavingsRateGenerator:
-    def run(self, db_session) -> None:
+    def run(self, db_session, months=None) -> None:
 
         # calculate the savings rate
         # The savings rate is calculated as the total savings divided by the total earnings
         # for the month
-        savings_rate_data = db_session.query(
+        savings_rate_data = select(
             MonthlyExpenses.transaction_month,
             case(
                 (MonthlyExpenses.total_earnings != 0,
                 MonthlyExpenses.total_savings / MonthlyExpenses.total_earnings),
-                else_=0).label('savings_rate')
-        ).all()
+                else_=0),
+            func.now()  # Use func.now() to get the current timestamp
+        )
 
-        for data in savings_rate_data:
-            summary_data = {
-                'transaction_month': data.transaction_month,
-                'savings_rate': data.savings_rate,
-                'inserted_datetime': func.now()  # Use func.now() to get the current timestamp
-            }
-
-            # insert or update the savings rate monthly summary
-            # Use the insert statement with on_conflict_do_update
-            # to handle conflicts based on the transaction_month
-            # and update the existing record
-            statement = insert(SavingsRate).values(summary_data)
-            statement = statement.on_conflict_do_update(
-                index_elements=['transaction_month'],
-                set_=summary_data
+        # Only refresh the given months, months left without data are removed
+        if months is not None:
+            savings_rate_data = savings_rate_data.where(
+                MonthlyExpenses.transaction_month.in_(months)
+            )
+            db_session.execute(
+                delete(SavingsRate).where(SavingsRate.transaction_month.in_(months))
             )
-            db_session.execute(statement)
 
-        db_session.commit()
\ No newline at end of file
+        # insert or update the savings rate monthly summary in a single statement
+        # Use INSERT ... SELECT with on_conflict_do_update
+        # to handle conflicts based on the transaction_month
+        # and update the existing record
+        columns = ['transaction_month', 'savings_rate', 'inserted_datetime']
+        statement = insert(SavingsRate).from_select(columns, savings_rate_data)
+        statement = statement.on_conflict_do_update(
+            index_elements=['transaction_month'],
+            set_={column: statement.excluded[column] for column in columns[1:]}
+        )
+        db_session.execute(statement)
+
+        db_session.commit()
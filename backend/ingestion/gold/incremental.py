@@ -0,0 +1,21 @@
+"""Helpers for generators refreshing only some months of the gold layer."""
+
+from datetime import date
+from sqlalchemy import and_, or_
+
+
+def next_month(month: date) -> date:
+    """First day of the month following the given month."""
+    if month.month == 12:
+        return date(month.year + 1, 1, 1)
+    return date(month.year, month.month + 1, 1)
+
+
+def in_months(column, months: list[date]):
+    """
+    Filter on a date column for the rows falling in the given months.
+    Uses plain range conditions so an index on the column can be used.
+    """
+    return or_(
+        *(and_(column >= month, column < next_month(month)) for month in months)
+    )
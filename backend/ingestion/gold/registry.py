@@ -0,0 +1,83 @@
+"""
+This module provides the gold generator registry:
+    - Resolves generator classes from g_t_pipeline_config once per process.
+    - Caches the active configuration, reloading it after a TTL or on invalidate().
+Usage example:
+    configs = generator_registry.get_active_configs(db_handler)
+    generator_class = generator_registry.resolve(config.module_path, config.class_name)
+"""
+
+import importlib
+import threading
+import time
+from typing import Optional
+from backend.core.database_handler import DatabaseHandler
+from backend.models.models import PipelineConfiguration
+
+DEFAULT_CONFIG_TTL_SECONDS = 300
+
+
+class GeneratorRegistry:
+    """Keeps gold generator classes and the active pipeline configuration in memory."""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_CONFIG_TTL_SECONDS) -> None:
+        self.ttl_seconds = ttl_seconds
+        self._classes: dict[tuple[str, str], type] = {}
+        self._configs: Optional[list[PipelineConfiguration]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def resolve(self, module_path: str, class_name: str) -> type:
+        """
+        Returns the generator class, importing its module on first use only.
+        Raises ImportError, AttributeError or TypeError for an invalid generator.
+        """
+        key = (module_path, class_name)
+        generator_class = self._classes.get(key)
+
+        if generator_class is None:
+            module = importlib.import_module(module_path)
+            generator_class = getattr(module, class_name)
+
+            if not callable(getattr(generator_class, "run", None)):
+                raise TypeError(f"{module_path}.{class_name} has no run method.")
+
+            self._classes[key] = generator_class
+        return generator_class
+
+    def get_active_configs(self, db_handler: DatabaseHandler) -> list[PipelineConfiguration]:
+        """
+        Returns the active pipeline configurations, reloaded once the TTL expired.
+        Every generator is resolved on load, so a bad configuration fails here
+        instead of in the middle of a gold run.
+        """
+        with self._lock:
+            if self._configs is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+                return self._configs
+
+            with db_handler.get_db_session() as session:
+                configs = session.query(PipelineConfiguration).filter_by(active=True).all()
+                session.expunge_all()
+
+            errors = []
+            for config in configs:
+                try:
+                    self.resolve(config.module_path, config.class_name)
+                except Exception as e:
+                    errors.append(f"{config.module_path}.{config.class_name}: {e}")
+
+            if errors:
+                raise ValueError("Invalid gold pipeline configuration:\n" + "\n".join(errors))
+
+            self._configs = configs
+            self._loaded_at = time.monotonic()
+            return configs
+
+    def invalidate(self) -> None:
+        """Forgets the cached configuration, to be called after g_t_pipeline_config changes."""
+        with self._lock:
+            self._configs = None
+
+
+# process-wide registry
+generator_registry = GeneratorRegistry()
@@ -2,29 +2,42 @@
 
 import os
 import sys
+from functools import lru_cache
 
 sys.path.append(os.getcwd())
 
 from backend.ingestion.gold.g_t_pipeline_config import GoldPipelineRunner
+from backend.ingestion.gold.registry import generator_registry
 from backend.core.types import Result
 from backend.core.database_handler import DatabaseHandler
 
 
-def gold_pipeline() -> Result:
-    """Run all active gold pipelines."""
-    db_handler = DatabaseHandler()
+@lru_cache(maxsize=1)
+def get_gold_runner() -> GoldPipelineRunner:
+    """
+    One runner per process, the gold configuration is validated when it is built.
+    Raises ValueError for an invalid configuration, the next call tries again.
+    """
+    return GoldPipelineRunner(DatabaseHandler())
 
-    with db_handler.get_db_session() as db_session:
-        try:
-            runner = GoldPipelineRunner(db_session)
-            result = runner.run()
-            return result
-        except Exception as e:
-            return Result(
-                success=False, message=f"Error found while running gold pipeline: {e}"
-            )
+
+def gold_pipeline(full_refresh: bool = False) -> Result:
+    """
+    Run all active gold pipelines.
+    Only the months changed in silver since the last run are refreshed,
+    unless full_refresh is set.
+    A full refresh also reloads g_t_pipeline_config, to apply changes at once.
+    """
+    try:
+        if full_refresh:
+            generator_registry.invalidate()
+        return get_gold_runner().run(full_refresh=full_refresh)
+    except Exception as e:
+        return Result(
+            success=False, message=f"Error found while running gold pipeline: {e}"
+        )
 
 if __name__ == "__main__":
-    result = gold_pipeline()
+    result = gold_pipeline(full_refresh="--full-refresh" in sys.argv)
     print(f"Success: {result.success}")
     print(f"Message: {result.message}")
\ No newline at end of file
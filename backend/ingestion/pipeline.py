@@ -1,15 +1,31 @@
 """Script for full ingestion pipeline."""
 
+from typing import Optional
 from prefect import flow, task
+from prefect.task_runners import ThreadPoolTaskRunner
 from backend.ingestion.silver_pipeline import silver_pipeline
-from backend.ingestion.gold_pipeline import gold_pipeline
+from backend.ingestion.gold_pipeline import get_gold_runner, gold_pipeline
+from backend.core.file_handler import FileHandler
+from backend.core.settings import get_settings
 from backend.core.types import Result
+from backend.models.models import ProcessingStageEnum
+
+DEFAULT_SILVER_CONCURRENCY = 4
+# rows read, validated and loaded at a time by the silver pipeline
+DEFAULT_SILVER_CHUNKSIZE = 50_000
+
+
+def get_silver_chunksize() -> int:
+    """Chunk size of the silver pipeline, [pipeline] chunksize in the settings."""
+    return get_settings().get("pipeline", {}).get("chunksize", DEFAULT_SILVER_CHUNKSIZE)
 
 
 @task
-def run_silver_pipeline(file_id: str, file_config_id: int) -> Result:
+def run_silver_pipeline(
+    file_id: str, file_config_id: int, chunksize: Optional[int] = None
+) -> Result:
     """Task to run the silver pipeline."""
-    return silver_pipeline(file_id, file_config_id)
+    return silver_pipeline(file_id, file_config_id, chunksize=chunksize)
 
 
 @task
@@ -18,12 +34,53 @@ def run_gold_pipeline() -> Result:
     return gold_pipeline()
 
 
+def check_gold_configuration() -> Result:
+    """
+    Resolve the gold generators before any file is processed.
+    They are validated once per process, when the gold runner is built.
+    """
+    try:
+        get_gold_runner()
+        return Result(success=True)
+    except Exception as e:
+        return Result(success=False, message=f"Gold configuration is invalid: {e}")
+
+
+def clear_processing_progress(file_ids: list[str]) -> None:
+    """Clears the stage and rows processed, once the files left the pipeline."""
+    FileHandler().update_file_attributes(
+        file_ids, {"processing_stage": None, "rows_processed": None}
+    )
+
+
 @flow
-def pipeline(file_id: str, file_config_id: int) -> Result:
-    """Full ingestion pipeline flow."""
-    silver_result = run_silver_pipeline(file_id, file_config_id)
+def pipeline(
+    file_id: str, file_config_id: int, chunksize: Optional[int] = None
+) -> Result:
+    """
+    Full ingestion pipeline flow.
+    The file is loaded chunksize rows at a time, from the settings if not given.
+    """
+    try:
+        return _pipeline(file_id, file_config_id, chunksize)
+    finally:
+        clear_processing_progress([file_id])
+
+
+def _pipeline(file_id: str, file_config_id: int, chunksize: Optional[int]) -> Result:
+    gold_config_result = check_gold_configuration()
+
+    if not gold_config_result.success:
+        return gold_config_result
+
+    silver_result = run_silver_pipeline(
+        file_id, file_config_id, chunksize or get_silver_chunksize()
+    )
 
     if silver_result.success:
+        FileHandler().update_file_attributes(
+            [file_id], {"processing_stage": ProcessingStageEnum.GOLD.value}
+        )
         gold_result = run_gold_pipeline()
 
         if gold_result.success:
@@ -37,3 +94,86 @@ def pipeline(file_id: str, file_config_id: int) -> Result:
     return Result(
         success=False, message=f"Silver ingestion failed: {silver_result.message}"
     )
+
+
+@flow(task_runner=ThreadPoolTaskRunner(max_workers=DEFAULT_SILVER_CONCURRENCY))
+def batch_pipeline(
+    file_ids: Optional[list[str]] = None, chunksize: Optional[int] = None
+) -> Result:
+    """
+    Ingestion pipeline flow for many files.
+    Runs the silver pipeline of the given files, or of all UPLOADED files,
+    in parallel and the gold pipeline once at the end. Given files that are
+    not UPLOADED or FAILED are skipped, so their rows are not loaded twice.
+
+    Use batch_pipeline.with_options(task_runner=ThreadPoolTaskRunner(max_workers=n))
+    to change the number of files processed at the same time.
+    """
+    gold_config_result = check_gold_configuration()
+
+    if not gold_config_result.success:
+        return gold_config_result
+
+    files_result = FileHandler().get_files_to_process(file_ids)
+
+    if not files_result.success:
+        return Result(success=False, message=files_result.message)
+
+    if file_ids is not None:
+        skipped = set(file_ids) - {file["file_id"] for file in files_result.data}
+        if skipped:
+            print(f"Skipping files not UPLOADED or FAILED: {', '.join(sorted(skipped))}")
+
+    if not files_result.data:
+        return Result(success=True, message="No files to process.")
+
+    try:
+        return _batch_pipeline(files_result.data, chunksize)
+    finally:
+        clear_processing_progress([file["file_id"] for file in files_result.data])
+
+
+def _batch_pipeline(files: list[dict], chunksize: Optional[int]) -> Result:
+    chunksize = chunksize or get_silver_chunksize()
+    silver_futures = {
+        file["file_id"]: run_silver_pipeline.submit(
+            file["file_id"], file["file_config_id"], chunksize
+        )
+        for file in files
+    }
+    silver_results = {
+        file_id: future.result() for file_id, future in silver_futures.items()
+    }
+
+    silver_errors = [
+        f"{file_id}: {result.message}"
+        for file_id, result in silver_results.items()
+        if not result.success
+    ]
+
+    if len(silver_errors) == len(silver_results):
+        return Result(
+            success=False,
+            message="Silver ingestion failed:\n" + "\n".join(silver_errors),
+        )
+
+    FileHandler().update_file_attributes(
+        [file_id for file_id, result in silver_results.items() if result.success],
+        {"processing_stage": ProcessingStageEnum.GOLD.value},
+    )
+    gold_result = run_gold_pipeline()
+
+    if not gold_result.success:
+        return Result(
+            success=False, message=f"Gold ingestion failed: {gold_result.message}"
+        )
+    if silver_errors:
+        return Result(
+            success=False,
+            message="Gold ingestion completed, silver ingestion failed for:\n"
+            + "\n".join(silver_errors),
+        )
+    return Result(
+        success=True,
+        message=f"Silver ingestion of {len(silver_results)} file(s) and Gold ingestion completed successfully",
+    )
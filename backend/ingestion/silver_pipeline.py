@@ -2,13 +2,15 @@
 This module contains the task to load the files stored in kDrive to the silver layer.
 """
 
-from io import BytesIO
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
 import pandas as pd
-import streamlit as st
+from backend.core.file_cache import get_file_cache
+from backend.core.settings import get_settings
 from backend.core.types import Result
 from backend.core.kdrive_handler import KDriveHandler
 from backend.core.file_handler import FileHandler
-from backend.models.models import Expense, FailedExpense
+from backend.models.models import Expense, FileConfiguration, ProcessingStageEnum
 from backend.validation.base_validator import DataFrameValidatorPipeline
 from backend.validation.validators.expense_validators import (
     DuplicatesValidator,
@@ -22,35 +24,79 @@ from backend.validation.cleaning.expense_cleaners import (
 )
 from backend.validation.cleaning.base_cleaner import CleaningPipeline
 
+# absolute amounts must stay below this to fit s_t_expenses.amount (Numeric(12, 2))
+MAX_AMOUNT = 10 ** (Expense.amount.type.precision - Expense.amount.type.scale)
 
-def silver_pipeline(file_id: str, file_config_id: int) -> Result:
+# columns read in the first pass of a chunked file to match internal transfers
+TRANSFER_COLUMNS = ["TRANSACTION_DATE", "AMOUNT", "ACCOUNT"]
+
+
+@lru_cache(maxsize=1)
+def get_drive_handler() -> KDriveHandler:
+    """One handler per process, so batch runs share its pooled connections."""
+    return KDriveHandler(get_settings())
+
+
+def silver_pipeline(
+    file_id: str,
+    file_config_id: int,
+    match_loaded_transfers: bool = False,
+    chunksize: Optional[int] = None,
+) -> Result:
     """
     Task to load the files stored in kDrive to the silver layer.
     This task:
-    - Downloads the file from kDrive
+    - Reads the file from the local cache, or downloads it from kDrive
     - Reads the file in CSV format
     - Validates: no duplicates, data types, date format, etc.
     -   Good data moves to s_t_expenses
     -   Bad data moves to s_t_expenses_error
+    -   Both are loaded in a single transaction
     - Updates the status of the file in the database
+
+    With match_loaded_transfers, outgoing internal transfers are also matched
+    against incoming expenses of other files already loaded to s_t_expenses.
+    Transfers whose outgoing side was loaded first are not matched.
+
+    With chunksize, the file is read, validated, cleaned and loaded
+    chunksize rows at a time to keep memory bounded on large statements.
     """
-    drive_handler = KDriveHandler(st.secrets)
+    drive_handler = get_drive_handler()
     file_handler = FileHandler()
+    file_content = None
 
     try:
-        # STEP 1: Download the file from kDrive
-        print(f"Downloading file with ID: {file_id} from kDrive...")
-        result = drive_handler.download_file(file_id)
+        file_handler.update_file_attributes(
+            [file_id], {"processing_stage": ProcessingStageEnum.READING.value}
+        )
 
-        if not result.success:
-            return Result(
-                success=False,
-                message=f"""
-                Failed to download file with ID: {file_id}.
-                Reason: {result.message}""",
-            )
+        # STEP 1: Read the file from the local cache or download it from kDrive
+        file_cache = get_file_cache()
+        checksum_result = file_handler.get_file_checksum(file_id)
 
-        file_content = result.data
+        if checksum_result.success:
+            file_content = file_cache.open(checksum_result.data)
+
+        if file_content is not None:
+            print(f"Reading file with ID: {file_id} from the local cache...")
+        else:
+            print(f"Downloading file with ID: {file_id} from kDrive...")
+            result = drive_handler.download_file(file_id)
+
+            if not result.success:
+                return Result(
+                    success=False,
+                    message=f"""
+                    Failed to download file with ID: {file_id}.
+                    Reason: {result.message}""",
+                )
+
+            # binary file object, spooled to disk for large files
+            file_content = result.data
+
+            # the next processing attempt reads the local copy
+            if checksum_result.success:
+                file_cache.put(checksum_result.data, file_content)
 
         # STEP 2: Fetch file configuration from the database
         print(f"Fetching file configuration with ID: {file_config_id}...")
@@ -68,117 +114,79 @@ def silver_pipeline(file_id: str, file_config_id: int) -> Result:
 
         # STEP 3: Read the file in CSV format
         print(f"Reading file content for file ID: {file_id}...")
+        read_options = {
+            "encoding": file_config.encoding,
+            "sep": file_config.delimiter,
+            "decimal": file_config.decimal_separator,
+        }
+        transfers_validator = InternalTransfersValidator(
+            match_loaded_expenses=match_loaded_transfers,
+            date_format=file_config.date_format,
+            amount_sign=file_config.amount_sign,
+            file_id=file_id,
+        )
+
         try:
-            df = pd.read_csv(
-                BytesIO(file_content),
-                encoding=file_config.encoding,
-                sep=file_config.delimiter,
-                decimal=file_config.decimal_separator,
-            )
+            if chunksize:
+                # transfers need a file-wide view: summarize their key columns first
+                for keys in pd.read_csv(
+                    file_content,
+                    usecols=TRANSFER_COLUMNS,
+                    chunksize=chunksize,
+                    **read_options,
+                ):
+                    transfers_validator.observe(keys)
+
+                file_content.seek(0)
+                chunks = pd.read_csv(
+                    file_content, chunksize=chunksize, **read_options
+                )
+            else:
+                chunks = [pd.read_csv(file_content, **read_options)]
         except Exception as e:
             return Result(
                 success=False,
                 message=f"Failed to read file content: {e}",
             )
 
-        # STEP 4: Run validators
-        print(f"Running validations for file ID: {file_id}...")
-        validators = [
-            DuplicatesValidator(),
-            DateFormatValidator(file_config.date_format),
-            InternalTransfersValidator()
-        ]
-
-        validator_pipeline = DataFrameValidatorPipeline(validators)
-        validation_result = validator_pipeline.run_validations(df)
-
-        df = validation_result.data
-
-        valid_rows = df[df["is_valid"]].copy()
-        failed_rows = df[~df["is_valid"]].copy()
-
-        # STEP 5: Clean valid rows
-        print(f"Cleaning valid rows for file ID: {file_id}...")
-        cleaners = [
-            TrimColumnCleaner(),
-            FormatDateCleaner(file_config.date_format),
-            FormatAmountSignCleaner(file_config.amount_sign),
-        ]
-        cleaning_pipeline = CleaningPipeline(cleaners)
-
-        valid_expenses = []
-
-        for _, row in valid_rows.iterrows():
-            cleaned_row = cleaning_pipeline.run(row)
-            try:
-                expense = Expense(
-                    file_id=file_id,
-                    transaction_date=cleaned_row.TRANSACTION_DATE,
-                    description=cleaned_row.DESCRIPTION,
-                    amount=cleaned_row.AMOUNT,
-                    category=cleaned_row.CATEGORY,
-                    account=cleaned_row.ACCOUNT,
-                )
-                valid_expenses.append(expense)
-            except Exception as e:
-                # add to failed_rows as well
-                failed_rows = failed_rows.append(
-                    {
-                        **row.to_dict(),
-                        "error_message": row.get("error_message", "")
-                        + f"Cleaning error: {str(e)}",
-                    },
-                    ignore_index=True,
-                )
+        # STEP 4: Set up validators, they keep their state across chunks
+        date_validator = DateFormatValidator(file_config.date_format)
+        validator_pipeline = DataFrameValidatorPipeline(
+            [
+                DuplicatesValidator(),
+                date_validator,
+                transfers_validator,
+            ]
+        )
 
-        # STEP 7: Prepare FailedExpenses objects from failed_rows
-        print(f"Preparing failed expenses for file ID: {file_id}...")
-        failed_expenses = []
-        for _, row in failed_rows.iterrows():
-            failed_expense = FailedExpense(
-                file_id=file_id,
-                transaction_date=str(row.TRANSACTION_DATE),
-                description=str(row.DESCRIPTION),
-                amount=str(row.AMOUNT),
-                category=str(row.CATEGORY),
-                account=str(row.ACCOUNT),
-                error_message=str(row.error_message),
+        # STEP 5: Validate, clean and insert good and bad data in one transaction
+        print(f"Inserting expenses for file ID: {file_id}...")
+        file_handler.update_file_attributes(
+            [file_id],
+            {"processing_stage": ProcessingStageEnum.LOADING.value, "rows_processed": 0},
+        )
+        result = file_handler.insert_expense_batches(
+            _process_chunks(
+                chunks, file_id, file_config, validator_pipeline, date_validator, file_handler
             )
-            failed_expenses.append(failed_expense)
-
-        # Step 8: Insert good data into s_t_expenses
-        print(f"Inserting valid expenses for file ID: {file_id}...")
-        for expense in valid_expenses:
-            result = file_handler.insert_expenses(expense, data_condition="good")
-
-            if not result.success:
-                return Result(
-                    success=False,
-                    message=f"""
-                    Failed to insert data into the database.
-                    Reason: {result.message}""",
-                )
+        )
 
-        # Step 9: Insert bad data into s_t_expenses_error
-        print(f"Inserting failed expenses for file ID: {file_id}...")
-        for failed_expense in failed_expenses:
-            result = file_handler.insert_expenses(
-                failed_expense, data_condition="error"
+        if not result.success:
+            return Result(
+                success=False,
+                message=f"""
+                Failed to insert data into the database.
+                Reason: {result.message}""",
             )
 
-            if not result.success:
-                return Result(
-                    success=False,
-                    message=f"""
-                    Failed to insert error data into the database.
-                    Reason: {result.message}""",
-                )
-
-        # STEP 10: Update the status and ingested datetime of the file
+        # STEP 6: Update the status and ingested datetime of the file
         print(f"Updating file metadata for file ID: {file_id}...")
-        if not failed_expenses:
+        valid_count = result.data["expenses"]
+        failed_count = result.data["failed_expenses"]
+
+        if not failed_count:
             file_status = 3  # Completed
-        elif valid_expenses and failed_expenses:
+        elif valid_count and failed_count:
             file_status = 4  # Partially completed
         else:
             file_status = 9  # Failed
@@ -196,3 +204,139 @@ def silver_pipeline(file_id: str, file_config_id: int) -> Result:
         return Result(success=True, message="Data loaded to the silver layer.")
     except Exception as e:
         return Result(success=False, message=str(e))
+    finally:
+        if file_content is not None:
+            file_content.close()
+
+
+def _process_chunks(
+    chunks: Iterable[pd.DataFrame],
+    file_id: str,
+    file_config: FileConfiguration,
+    validator_pipeline: DataFrameValidatorPipeline,
+    date_validator: DateFormatValidator,
+    file_handler: FileHandler,
+) -> Iterator[tuple[list[dict], list[dict]]]:
+    """
+    Processes the chunks one at a time and reports the rows processed
+    once each batch has been consumed by the insert.
+    """
+    rows_processed = 0
+
+    for chunk in chunks:
+        yield _process_chunk(
+            chunk, file_id, file_config, validator_pipeline, date_validator
+        )
+        rows_processed += len(chunk)
+        file_handler.update_file_attributes(
+            [file_id], {"rows_processed": rows_processed}
+        )
+
+
+def _process_chunk(
+    df: pd.DataFrame,
+    file_id: str,
+    file_config: FileConfiguration,
+    validator_pipeline: DataFrameValidatorPipeline,
+    date_validator: DateFormatValidator,
+) -> tuple[list[dict], list[dict]]:
+    """
+    Validates, cleans and converts one chunk of the file.
+    Returns the s_t_expenses and s_t_expenses_failed insert parameters.
+    """
+    # Run validators
+    df = validator_pipeline.run_validations(df).data
+
+    valid_rows = df[df["is_valid"]].copy()
+    failed_rows = df[~df["is_valid"]].copy()
+
+    # Clean valid rows
+    cleaners = [
+        TrimColumnCleaner(),
+        FormatDateCleaner(
+            file_config.date_format, parsed_dates=date_validator.parsed_dates
+        ),
+        FormatAmountSignCleaner(file_config.amount_sign),
+    ]
+    cleaning_pipeline = CleaningPipeline(cleaners)
+    cleaned_rows = cleaning_pipeline.run(valid_rows.copy()).data
+
+    # rows that failed cleaning keep their raw values in the error table
+    cleaning_failed = ~cleaned_rows["is_valid"]
+    if cleaning_failed.any():
+        failed_rows = pd.concat(
+            [
+                failed_rows,
+                valid_rows[cleaning_failed].assign(
+                    error_message=cleaned_rows.loc[cleaning_failed, "error_message"]
+                ),
+            ]
+        )
+
+    # Convert cleaned rows to insert parameters
+    cleaned_rows = cleaned_rows[~cleaning_failed]
+    conversion_errors = _conversion_errors(cleaned_rows)
+    conversion_failed = conversion_errors != ""
+
+    if conversion_failed.any():
+        failed_rows = pd.concat(
+            [
+                failed_rows,
+                valid_rows.loc[cleaned_rows.index[conversion_failed]].assign(
+                    error_message=conversion_errors[conversion_failed]
+                ),
+            ]
+        )
+
+    valid_expenses = _to_expense_records(cleaned_rows[~conversion_failed], file_id)
+    failed_expenses = _to_failed_expense_records(failed_rows, file_id)
+
+    return valid_expenses, failed_expenses
+
+
+def _conversion_errors(df: pd.DataFrame) -> pd.Series:
+    """
+    Checks cleaned rows against the s_t_expenses column limits.
+    Returns the error message per row, empty for rows that can be loaded.
+    """
+    errors = pd.Series("", index=df.index)
+    errors[df["DESCRIPTION"].str.len() > Expense.description.type.length] += (
+        "Conversion error: description too long; "
+    )
+    errors[df["AMOUNT"].abs().round(2) >= MAX_AMOUNT] += (
+        "Conversion error: amount out of range; "
+    )
+    return errors
+
+
+def _to_expense_records(df: pd.DataFrame, file_id: str) -> list[dict]:
+    """Converts cleaned rows to s_t_expenses insert parameters."""
+    records = pd.DataFrame(
+        {
+            "file_id": file_id,
+            "transaction_date": df["TRANSACTION_DATE"].dt.date,
+            "description": df["DESCRIPTION"],
+            "amount": df["AMOUNT"].round(2),
+            "category": df["CATEGORY"],
+            "account": df["ACCOUNT"],
+        },
+        index=df.index,
+    ).astype(object)
+    return records.where(records.notna(), None).to_dict("records")
+
+
+def _to_failed_expense_records(df: pd.DataFrame, file_id: str) -> list[dict]:
+    """Converts failed rows to s_t_expenses_failed insert parameters, keeping raw values as text."""
+    records = pd.DataFrame(
+        {
+            "file_id": file_id,
+            "transaction_date": df["TRANSACTION_DATE"].astype(str),
+            "description": df["DESCRIPTION"].astype(str),
+            "amount": df["AMOUNT"].astype(str),
+            "category": df["CATEGORY"].astype(str),
+            "account": df["ACCOUNT"].astype(str),
+            "error_message": df["error_message"].astype(str),
+        },
+        index=df.index,
+    )
+    return records.to_dict("records")
@@ -12,6 +12,7 @@ from sqlalchemy import (
     Date,
     Numeric,
     ForeignKey,
+    Index,
     UniqueConstraint,
     func,
     Enum,
@@ -62,6 +63,23 @@ class FileConfiguration(Base, BaseModel):
     description = Column(String, default="", nullable=True)
 
 
+class CategoryBudget(Base, BaseModel):
+    """Monthly budget of an expense category, valid from a month onwards
+    until a budget with a later valid_from replaces it"""
+
+    __tablename__ = "cfg_t_category_budget"
+    __table_args__ = (
+        UniqueConstraint("category", "valid_from"),
+        {"schema": "cfg_sch"},
+    )
+
+    budget_id = Column(Integer, primary_key=True, autoincrement=True)
+    category = Column(String, nullable=False)
+    monthly_budget = Column(Numeric(12, 2), nullable=False)
+    valid_from = Column(Date, server_default=text("'1900-01-01'"), nullable=False)
+    inserted_datetime = Column(DateTime, server_default=func.now(), nullable=False)
+
+
 class FileStatusEnum(enum.Enum):
     UPLOADED = 1
     IN_PROGRESS = 2
@@ -70,6 +88,13 @@ class FileStatusEnum(enum.Enum):
     FAILED = 9
 
 
+class ProcessingStageEnum(enum.Enum):
+    QUEUED = "queued"
+    READING = "reading"
+    LOADING = "loading"
+    GOLD = "gold"
+
+
 class FileStatus(Base, BaseModel):
     """Status of the file processing"""
 
@@ -102,6 +127,9 @@ class Files(Base, BaseModel):
     )
     active = Column(Boolean, server_default=text("true"), nullable=False)
     error_message = Column(String, nullable=True)
+    # progress of a running ingestion, see ProcessingStageEnum
+    processing_stage = Column(String(20), nullable=True)
+    rows_processed = Column(Integer, nullable=True)
     inserted_datetime = Column(DateTime, server_default=func.now(), nullable=False)
     ingested_datetime = Column(DateTime, nullable=True)
 
@@ -111,6 +139,10 @@ class Files(Base, BaseModel):
         return hashlib.sha224(content).hexdigest()
 
 
+# serves the keyset pagination of the file listing, newest first
+Index("ix_cfg_t_files_inserted_datetime_file_id", Files.inserted_datetime, Files.file_id)
+
+
 # silver schema models
 class Expense(Base, BaseModel):
     """Stores a single expense record"""
@@ -133,6 +165,14 @@ class Expense(Base, BaseModel):
     expense_type = Column(String(10), nullable=True)
 
 
+# serves the cross-file lookup of internal transfers
+Index(
+    "ix_s_t_expenses_date_abs_amount",
+    Expense.transaction_date,
+    func.abs(Expense.amount),
+)
+
+
 class FailedExpense(Base, BaseModel):
     """Stores a single failed expense record"""
 
@@ -191,6 +231,58 @@ class SavingsRate(Base, BaseModel):
     inserted_datetime = Column(DateTime, server_default=func.now(), nullable=False)
 
 
+class CategoryVsBudget(Base, BaseModel):
+    """Monthly expenses per category next to the budget valid that month"""
+
+    __tablename__ = "g_t_category_vs_budget"
+    # the unique constraint also serves the lookup by month
+    __table_args__ = (
+        UniqueConstraint("transaction_month", "category"),
+        {"schema": "g_sch"},
+    )
+
+    category_vs_budget_id = Column(Integer, primary_key=True, autoincrement=True)
+    transaction_month = Column(Date, nullable=False)
+    category = Column(String, nullable=False)
+    # spend of the month as a positive amount, negative for net income
+    total_expenses = Column(Numeric(12, 2), nullable=False)
+    # null when the category has no budget
+    budget = Column(Numeric(12, 2), nullable=True)
+    inserted_datetime = Column(DateTime, server_default=func.now(), nullable=False)
+
+
+class MonthlyKpis(Base, BaseModel):
+    """Monthly totals with the previous month totals and the change in percent"""
+
+    __tablename__ = "g_t_monthly_kpis"
+    __table_args__ = {"schema": "g_sch"}
+
+    monthly_kpis_id = Column(Integer, primary_key=True, autoincrement=True)
+    transaction_month = Column(Date, nullable=False, index=True, unique=True)
+    total_expenses = Column(Numeric(12, 2), nullable=False)
+    total_earnings = Column(Numeric(12, 2), nullable=False)
+    total_savings = Column(Numeric(12, 2), nullable=False)
+    # previous calendar month, null when it has no data
+    previous_total_expenses = Column(Numeric(12, 2), nullable=True)
+    previous_total_earnings = Column(Numeric(12, 2), nullable=True)
+    previous_total_savings = Column(Numeric(12, 2), nullable=True)
+    expenses_change = Column(Numeric(12, 2), nullable=True)
+    earnings_change = Column(Numeric(12, 2), nullable=True)
+    savings_change = Column(Numeric(12, 2), nullable=True)
+    inserted_datetime = Column(DateTime, server_default=func.now(), nullable=False)
+
+
+class GoldRefreshMonth(Base, BaseModel):
+    """Months changed in the silver layer that the gold layer still has to refresh"""
+
+    __tablename__ = "g_t_refresh_months"
+    __table_args__ = {"schema": "g_sch"}
+
+    refresh_month_id = Column(Integer, primary_key=True, autoincrement=True)
+    transaction_month = Column(Date, nullable=False, unique=True)
+    inserted_datetime = Column(DateTime, server_default=func.now(), nullable=False)
+
+
 class PipelineConfiguration(Base, BaseModel):
     """Configuration for the ingestion pipeline"""
 
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
 import pandas as pd
+from backend.core.types import Result
 
 
 class BaseCleaner(ABC):
@@ -8,20 +9,42 @@ class BaseCleaner(ABC):
     """
 
     @abstractmethod
-    def clean(self, row: pd.Series) -> pd.Series:
-        """Cleans a singles row and returns the cleaned row."""
+    def clean(self, df: pd.DataFrame) -> Result:
+        """
+        Cleans the DataFrame columns in place.
+        Returns: <Boolean mask>, True for rows cleaned, False for rows that failed.
+        """
 
 
 class CleaningPipeline:
     """
-    A pipeline that runs a series of cleaners on a row of data.
+    A pipeline that runs a series of cleaners on a whole DataFrame.
     """
 
     def __init__(self, cleaners: list[BaseCleaner]):
         self.cleaners = cleaners
 
-    def run(self, row: pd.Series) -> pd.Series:
-        """Runner function."""
+    def run(self, df: pd.DataFrame) -> Result:
+        """
+        Run all cleaners and annotates the DataFrame with:
+        - is_valid: bool column for rows cleaned without errors
+        - error_message: concat string of all cleaning failures
+        """
+        df["is_valid"] = True
+        df["error_message"] = ""
+
         for cleaner in self.cleaners:
-            row = cleaner.clean(row)
-        return row
+            result = cleaner.clean(df)
+
+            df["is_valid"] &= result.data
+            df.loc[~result.data, "error_message"] += result.message + "; "
+
+        failed_rows = (~df["is_valid"]).sum()
+
+        if failed_rows > 0:
+            return Result(
+                success=False,
+                message=f"{failed_rows} rows(s) failed cleaning.",
+                data=df,
+            )
+        return Result(success=True, message="All rows are clean.", data=df)
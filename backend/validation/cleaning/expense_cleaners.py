@@ -1,4 +1,6 @@
+from typing import Optional
 import pandas as pd
+from backend.core.types import Result
 from backend.validation.cleaning.base_cleaner import BaseCleaner
 
 
@@ -8,24 +10,41 @@ class TrimColumnCleaner(BaseCleaner):
     from the beginning and end of each string.
     """
 
-    def clean(self, row: pd.Series) -> pd.Series:
-        row["DESCRIPTION"] = row["DESCRIPTION"].strip()
-        return row
+    def clean(self, df: pd.DataFrame) -> Result:
+        df["DESCRIPTION"] = df["DESCRIPTION"].astype("string").str.strip()
+        valid_mask = df["DESCRIPTION"].notna()
+
+        return Result(
+            success=valid_mask.all(),
+            message="Cleaning error: missing description.",
+            data=valid_mask,
+        )
 
 
 class FormatDateCleaner(BaseCleaner):
     """
     Cleans the column by converting it to the expected datetime format.
+    If the dates were already parsed during validation, they are reused.
     """
 
-    def __init__(self, date_format: str):
+    def __init__(self, date_format: str, parsed_dates: Optional[pd.Series] = None):
         self.date_format = date_format
+        self.parsed_dates = parsed_dates
+
+    def clean(self, df: pd.DataFrame) -> Result:
+        if self.parsed_dates is not None:
+            df["TRANSACTION_DATE"] = self.parsed_dates.reindex(df.index)
+        else:
+            df["TRANSACTION_DATE"] = pd.to_datetime(
+                df["TRANSACTION_DATE"], format=self.date_format, errors="coerce"
+            )
+        valid_mask = df["TRANSACTION_DATE"].notna()
 
-    def clean(self, row: pd.Series) -> pd.Series:
-        row["TRANSACTION_DATE"] = pd.to_datetime(
-            row.TRANSACTION_DATE, format=self.date_format
+        return Result(
+            success=valid_mask.all(),
+            message="Cleaning error: date could not be parsed.",
+            data=valid_mask,
         )
-        return row
 
 
 class FormatAmountSignCleaner(BaseCleaner):
@@ -36,9 +55,17 @@ class FormatAmountSignCleaner(BaseCleaner):
     def __init__(self, amount_sign: int):
         self.amount_sign = amount_sign
 
-    def clean(self, row: pd.Series) -> pd.Series:
-        original_amount = str(row["AMOUNT"]).strip()
+    def clean(self, df: pd.DataFrame) -> Result:
+        amount = df["AMOUNT"]
 
-        original_amount_float = float(original_amount)
-        row["AMOUNT"] = original_amount_float * self.amount_sign
-        return row
+        if not pd.api.types.is_numeric_dtype(amount):
+            amount = pd.to_numeric(amount.astype(str).str.strip(), errors="coerce")
+
+        df["AMOUNT"] = amount * self.amount_sign
+        valid_mask = df["AMOUNT"].notna()
+
+        return Result(
+            success=valid_mask.all(),
+            message="Cleaning error: amount is not a number.",
+            data=valid_mask,
+        )
@@ -3,8 +3,10 @@ Expense validators for the backend.
 This module validates expense data in a DataFrame.
 """
 
+from typing import Optional
 import pandas as pd
 from backend.core.types import Result
+from backend.core.file_handler import FileHandler
 from backend.validation.base_validator import BaseDataFrameValidator
 
 
@@ -12,13 +14,39 @@ from backend.validation.base_validator import BaseDataFrameValidator
 class DuplicatesValidator(BaseDataFrameValidator):
     """
     Validator to check for duplicate entries in the expense data.
+
+    Rows are compared through a 64-bit hash of the key columns. The hashes
+    already seen are kept, so a file validated in chunks flags the same rows
+    as when validated at once.
     """
 
+    subset = ["TRANSACTION_DATE", "AMOUNT", "DESCRIPTION"]
+
+    def __init__(self) -> None:
+        self._seen: set[int] = set()
+
     def validate(self, df: pd.DataFrame) -> Result:
-        # The ~ negates so that True means unique and False means duplicate.
-        valid_mask = ~df.duplicated(
-            subset=["TRANSACTION_DATE", "AMOUNT", "DESCRIPTION"], keep="first"
+        keys = df[self.subset].copy()
+
+        # chunks may infer different dtypes, compare numeric amounts as floats
+        amount = pd.to_numeric(keys["AMOUNT"], errors="coerce")
+        keys["AMOUNT"] = (
+            amount.astype("float64").astype(object).where(amount.notna(), keys["AMOUNT"])
         )
+        hashes = pd.util.hash_pandas_object(keys, index=False)
+
+        # hashes of earlier chunks, looked up in constant time per row
+        hash_values = hashes.tolist()
+        seen_before = pd.Series(
+            [value in self._seen for value in hash_values],
+            index=hashes.index,
+            dtype=bool,
+        )
+        self._seen.update(hash_values)
+
+        # The ~ negates so that True means unique and False means duplicate.
+        valid_mask = ~(hashes.duplicated(keep="first") | seen_before)
+
         return Result(
             success=True,
             message="Duplicate rows identified and flagged.",
@@ -36,58 +64,163 @@ class InternalTransfersValidator(BaseDataFrameValidator):
     - Same absolute amount
     - Not within the same account
 
-    Only the negative (outgoing) entries are removed.
+    Only the outgoing entries are removed: negative once `amount_sign` is
+    applied, the sign they are stored with in s_t_expenses.
+
+    A file read in chunks is first passed through `observe`, which keeps one
+    row per (date, absolute amount, account) so transfers split across
+    chunks are still matched.
+
+    With `match_loaded_expenses`, outgoing entries without a counterpart in
+    the file are also matched against incoming entries of other files already
+    loaded to s_t_expenses. This needs the file's `date_format` to compare
+    against the stored values. The match only goes one way: when the
+    outgoing side was loaded first, the file with the incoming side does not
+    remove it, and the transfer stays in s_t_expenses. Files loaded at the
+    same time do not see each other's rows either.
     """
 
+    key = ["TRANSACTION_DATE", "abs_AMOUNT"]
+
+    def __init__(
+        self,
+        match_loaded_expenses: bool = False,
+        date_format: Optional[str] = None,
+        amount_sign: int = 1,
+        file_id: Optional[str] = None,
+    ) -> None:
+        self.match_loaded_expenses = match_loaded_expenses
+        self.date_format = date_format
+        self.amount_sign = amount_sign
+        self.file_id = file_id
+        self.file_handler = FileHandler() if match_loaded_expenses else None
+        self._summary: Optional[pd.DataFrame] = None
+
+    def observe(self, df: pd.DataFrame) -> None:
+        """Adds a chunk of the file to the file-wide transfer summary."""
+        summary = self._summarize(df)
+        if self._summary is not None:
+            summary = self._summarize_accounts(pd.concat([self._summary, summary]))
+        self._summary = summary
+
     def validate(self, df: pd.DataFrame) -> Result:
         # convert AMOUNT column to a float
         df["AMOUNT"] = pd.to_numeric(df["AMOUNT"], errors='coerce')
 
-        df["abs_AMOUNT"] = df["AMOUNT"].abs()
-        grouped = df.groupby(["TRANSACTION_DATE", "abs_AMOUNT"])
-
-        to_remove = set()
-
-        for _, group in grouped:
-            has_positive = (group["AMOUNT"] > 0).any()
-            has_negative = (group["AMOUNT"] < 0).any()
-            multi_account = group["ACCOUNT"].nunique() > 1
-
-            if len(group) > 1 and multi_account and has_positive and has_negative:
-                to_remove.update(group[group["AMOUNT"] < 0].index)
+        summary = self._summary if self._summary is not None else self._summarize(df)
+        groups = summary.groupby(self.key).agg(
+            has_positive=("is_positive", "any"),
+            has_negative=("is_negative", "any"),
+            accounts=("ACCOUNT", "nunique"),
+        )
+        transfer_keys = groups.index[
+            groups["has_positive"] & groups["has_negative"] & (groups["accounts"] > 1)
+        ]
+
+        # rows with a missing date or amount never belong to a transfer
+        has_key = df["TRANSACTION_DATE"].notna() & df["AMOUNT"].notna()
+        row_keys = pd.MultiIndex.from_arrays(
+            [df["TRANSACTION_DATE"], df["AMOUNT"].astype("float64").abs()]
+        )
+        is_outgoing = df["AMOUNT"] * self.amount_sign < 0
+        is_transfer = has_key & is_outgoing & row_keys.isin(transfer_keys)
 
-        df.drop(columns=["abs_AMOUNT"], inplace=True)
-        valid_mask = ~df.index.isin(to_remove)
+        if self.match_loaded_expenses:
+            is_transfer |= self._match_loaded_expenses(
+                df, candidates=has_key & is_outgoing & ~is_transfer
+            )
 
         return Result(
             success=True,
             message="Internal transfers identified and excluded.",
-            data=valid_mask
+            data=~is_transfer
+        )
+
+    def _summarize(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Reduces rows to their transfer key, account and amount signs."""
+        amount = pd.to_numeric(df["AMOUNT"], errors="coerce").astype("float64")
+        keys = pd.DataFrame(
+            {
+                "TRANSACTION_DATE": df["TRANSACTION_DATE"],
+                "abs_AMOUNT": amount.abs(),
+                "ACCOUNT": df["ACCOUNT"],
+                "is_positive": amount > 0,
+                "is_negative": amount < 0,
+            }
+        ).dropna(subset=self.key)
+        return self._summarize_accounts(keys)
+
+    def _summarize_accounts(self, keys: pd.DataFrame) -> pd.DataFrame:
+        """Keeps one row per transfer key and account."""
+        return (
+            keys.groupby(self.key + ["ACCOUNT"], dropna=False)
+            .agg(is_positive=("is_positive", "any"), is_negative=("is_negative", "any"))
+            .reset_index()
+        )
+
+    def _match_loaded_expenses(self, df: pd.DataFrame, candidates: pd.Series) -> pd.Series:
+        """
+        Flags the outgoing candidate rows whose incoming counterpart, from
+        another account, is already stored in s_t_expenses.
+        """
+        is_transfer = pd.Series(False, index=df.index)
+
+        outgoing = pd.DataFrame(
+            {
+                "transaction_date": pd.to_datetime(
+                    df["TRANSACTION_DATE"], format=self.date_format, errors="coerce"
+                ).dt.date,
+                "abs_amount": df["AMOUNT"].abs().round(2),
+                "account": df["ACCOUNT"],
+            }
+        )[candidates].dropna(
+            subset=["transaction_date"]
+        )
+
+        if outgoing.empty:
+            return is_transfer
+
+        result = self.file_handler.get_transfer_counterparts(
+            outgoing[["transaction_date", "abs_amount"]].drop_duplicates(),
+            exclude_file_id=self.file_id,
         )
+        if not result.success:
+            raise RuntimeError(result.message)
+
+        counterparts = result.data
+        if counterparts.empty:
+            return is_transfer
+
+        matches = outgoing.rename_axis("row_id").reset_index().merge(
+            counterparts, on=["transaction_date", "abs_amount"], suffixes=("", "_loaded")
+        )
+        matches = matches[matches["account"] != matches["account_loaded"]]
+        is_transfer[is_transfer.index.isin(matches["row_id"])] = True
+
+        return is_transfer
 
 
 # date format validator
 class DateFormatValidator(BaseDataFrameValidator):
     """
     Validator to check if the date format is correct.
+
+    The column is parsed once and the parsed dates are kept in
+    `parsed_dates` so the cleaning step can reuse them.
     """
 
     def __init__(self, date_format: str) -> None:
         self.date_format = date_format
-
-    def is_valid_date(self, val) -> bool:
-        """Function to convert dates to expected format."""
-        try:
-            pd.to_datetime(val, format=self.date_format)
-            return True
-        except ValueError:
-            return False
+        self.parsed_dates: Optional[pd.Series] = None
 
     def validate(self, df: pd.DataFrame) -> Result:
-        wrong_date = df["TRANSACTION_DATE"].apply(self.is_valid_date)
+        self.parsed_dates = pd.to_datetime(
+            df["TRANSACTION_DATE"], format=self.date_format, errors="coerce"
+        )
+        valid_mask = self.parsed_dates.notna()
 
         return Result(
-            success=wrong_date.all(),
+            success=valid_mask.all(),
             message="Invalid date format found.",
-            data=wrong_date
+            data=valid_mask
         )
@@ -1,6 +1,6 @@
-import csv
 import ast
-from io import StringIO
+from typing import Optional
+from backend.core.file_inspector import inspect_file
 from backend.core.types import Result
 from backend.validation.base_validator import BaseValidator
 from backend.core.file_handler import FileHandler
@@ -8,16 +8,26 @@ from backend.models.models import Files, FileConfiguration
 
 
 class ChecksumValidator(BaseValidator):
-    """Validator to check if a file with the same checksum already exists."""
+    """
+    Validator to check if a file with the same checksum already exists.
+    A checksum already set in the file metadata is reused. When the existing
+    checksums of an upload batch were fetched beforehand, they are checked
+    without querying the database.
+    """
 
-    def __init__(self) -> None:
-        self.file_handler = FileHandler()
+    def __init__(self, existing_checksums: Optional[set[str]] = None) -> None:
+        self.existing_checksums = existing_checksums
+        self.file_handler = FileHandler() if existing_checksums is None else None
 
     def validate(self, file_content: bytes, file_metadata: dict) -> Result:
-        checksum = Files.generate_checksum(file_content)
-        result = self.file_handler.get_file_by_checksum(checksum)
+        checksum = file_metadata.get("checksum") or Files.generate_checksum(file_content)
 
-        if result.success:
+        if self.existing_checksums is not None:
+            is_duplicate = checksum in self.existing_checksums
+        else:
+            is_duplicate = self.file_handler.get_file_by_checksum(checksum).success
+
+        if is_duplicate:
             return Result(
                 success=False,
                 message=f"""
@@ -29,7 +39,11 @@ class ChecksumValidator(BaseValidator):
 
 
 class SchemaValidator(BaseValidator):
-    """Validator to check if the file schema is valid."""
+    """
+    Validator to check if the file schema is valid.
+    Reuses the inspection in the file metadata when the bronze stage already
+    inspected the file, otherwise inspects it.
+    """
 
     def __init__(self, file_config: FileConfiguration) -> None:
         self.expected_schema = ast.literal_eval(file_config.expected_schema)
@@ -37,15 +51,22 @@ class SchemaValidator(BaseValidator):
         self.file_delimiter = file_config.delimiter
 
     def validate(self, file_content: bytes, file_metadata: dict) -> Result:
-        try:
-            decoded_content = file_content.decode(self.encoding)
-        except UnicodeDecodeError:
+        inspection = file_metadata.get("inspection") or inspect_file(
+            file_content, self.encoding, self.file_delimiter
+        )
+
+        if inspection.encoding_error:
             return Result(
                 success=False, message=f"⚠️ File encoding is not {self.encoding}."
             )
 
-        reader = csv.reader(StringIO(decoded_content), delimiter=self.file_delimiter)
-        header = next(reader, None)
+        if inspection.parsing_error:
+            return Result(
+                success=False,
+                message=f"⚠️ File could not be parsed: {inspection.parsing_error}",
+            )
+
+        header = inspection.header
 
         if not header:
             return Result(success=False, message="⚠️ File is empty or has no header.")
@@ -7,199 +7,283 @@ import pandas as pd
 
 sys.path.append(os.getcwd())
 
+from backend.core.settings import configure
 from backend.core.types import Result
-from backend.ingestion.pipeline import pipeline
 from backend.core.kdrive_handler import KDriveHandler
 from backend.core.file_handler import FileHandler
-from backend.models.models import Files, FileStatusEnum
-from backend.validation.base_validator import FileValidatorPipeline
-from backend.validation.validators.file_validators import (
-    ChecksumValidator,
-    SchemaValidator,
+from backend.core.file_cache import get_file_cache
+from backend.ingestion.background import (
+    DEFAULT_BACKGROUND_WORKERS,
+    PipelineExecutor,
 )
+from backend.ingestion.bronze_pipeline import (
+    DEFAULT_UPLOAD_CONCURRENCY,
+    run_bronze_pipelines,
+)
+from backend.models.models import FileStatusEnum
 
 st.set_page_config(page_title="APP", layout="wide")
 
-drive_handler = KDriveHandler(st.secrets)
-file_handler = FileHandler()
+# backend modules read their settings from the Streamlit secrets
+configure(st.secrets)
+
+
+@st.cache_resource
+def get_handlers() -> tuple[KDriveHandler, FileHandler]:
+    """Handlers are created once and reused across reruns and sessions."""
+    return KDriveHandler(st.secrets), FileHandler()
+
+
+@st.cache_resource
+def get_pipeline_executor() -> PipelineExecutor:
+    """Background pipelines outlive the reruns and are shared by sessions."""
+    return PipelineExecutor(
+        st.secrets.get("app", {}).get(
+            "processing_concurrency", DEFAULT_BACKGROUND_WORKERS
+        )
+    )
+
+
+drive_handler, file_handler = get_handlers()
+pipeline_executor = get_pipeline_executor()
 
 st.title("Expenses Tracker")
 
+# kDrive call latency since the app started, shared by every session
+with st.sidebar.expander("kDrive latency"):
+    kdrive_metrics = drive_handler.get_metrics()
+    if kdrive_metrics:
+        st.dataframe(
+            pd.DataFrame.from_dict(kdrive_metrics, orient="index").round(3)
+        )
+    else:
+        st.caption("No kDrive calls yet.")
+
 # Bronze Layer: Upload files to Google Drive and validate them
 st.subheader("📥 Upload Files")
 uploaded_files = st.file_uploader(
     "Load here your expenses in CSV format.", type="csv", accept_multiple_files=True
 )
 
+UPLOAD_SUCCEEDED = False
+
 if uploaded_files:
-    for uploaded_file in uploaded_files:
-        with st.spinner(f"Processing {uploaded_file.name}...", show_time=True):
-
-            rollback_actions = []
-
-            try:
-                file_content = uploaded_file.getvalue()
-
-                determine_config_id_result = file_handler.determine_file_config_id(
-                    uploaded_file.name
-                )
-
-                if not determine_config_id_result.success:
-                    raise RuntimeError(
-                        f"Failed to determine file config ID: {determine_config_id_result.message}"
-                    )
-
-                file_metadata = {
-                    "file_name": uploaded_file.name,
-                    "file_size": len(file_content),
-                    "file_config_id": determine_config_id_result.data,
-                }
-
-                # Step 2: Setting up validators
-                get_config_result = file_handler.get_file_config(
-                    file_metadata["file_config_id"]
-                )
-
-                if not get_config_result.success:
-                    raise RuntimeError(
-                        f"Failed to get file config: {get_config_result.message}"
-                    )
-
-                validators = [
-                    ChecksumValidator(),
-                    SchemaValidator(
-                        file_config=get_config_result.data,
-                    ),
-                ]
-                validation_pipeline = FileValidatorPipeline(validators)
-
-                # Step 3: Running validators
-                validations_result = validation_pipeline.run_validations(
-                    file_content, file_metadata
-                )
-                if not validations_result.success:
-                    raise RuntimeError(
-                        f"File didn't pass validations: {validations_result.message}"
-                    )
-
-                # Step 4: Upload to kDrive
-                file_upload_result = drive_handler.upload_file(
-                    file_content, file_metadata
-                )
-
-                if not file_upload_result.success:
-                    raise Exception(f"Error while uploading file: {file_upload_result.message}")
-
-                # Register rollback: if error occurs later
-                # Delete the uploaded file
-                rollback_actions.append(
-                    lambda: drive_handler.delete_file(file_upload_result.data)
-                )
-
-                # Step 5: Store metadata in database
-                expenses_file = Files(
-                    file_id=file_upload_result.data,
-                    file_source=file_metadata["file_name"].split("_")[0],
-                    file_name=file_metadata["file_name"],
-                    file_size=file_metadata["file_size"],
-                    number_rows=file_content.count(b"\n") - 1,
-                    checksum=file_metadata["checksum"],
-                    file_status_id=FileStatusEnum.UPLOADED.value,
-                    file_config_id=file_metadata["file_config_id"],
-                )
-
-                upload_metadata_result = file_handler.upload_file_metadata(
-                    expenses_file
-                )
-
-                if not upload_metadata_result.success:
-                    raise Exception(f"{upload_metadata_result.message}")
-
-                st.success(f"✅ File {uploaded_file.name} uploaded successfully.")
-
-            except Exception as e:
-                # trigger rollback actions
-                for action in reversed(rollback_actions):
-                    try:
-                        action()
-                    except Exception as rollback_error:
-                        st.error(f"⚠️ Rollback failed: {rollback_error}")
-
-                st.error(f"❌ Something went wrong: {str(e)}")
+    with st.spinner(f"Processing {len(uploaded_files)} file(s)...", show_time=True):
+        upload_results = run_bronze_pipelines(
+            [
+                (uploaded_file.name, uploaded_file.getvalue())
+                for uploaded_file in uploaded_files
+            ],
+            drive_handler,
+            file_handler,
+            max_workers=st.secrets.get("app", {}).get(
+                "upload_concurrency", DEFAULT_UPLOAD_CONCURRENCY
+            ),
+            file_cache=get_file_cache(),
+        )
+
+    for upload_result in upload_results:
+        if upload_result.success:
+            UPLOAD_SUCCEEDED = True
+            st.success(f"✅ {upload_result.message}")
+        else:
+            st.error(f"❌ Something went wrong: {upload_result.message}")
 
 # File Processing Status
 st.subheader("📊 File Processing Status")
 st.caption("Select a file to start processing and track its status.")
 
-#  Fetch all files from the database
-get_all_files_result = file_handler.get_all_files()
-
-if not get_all_files_result.success:
-    st.error(f"Something went wrong: {get_all_files_result.message}")
-
-# Display the files in a table format
-df = pd.DataFrame(get_all_files_result.data)
-
-#
-CLICKED_FILE_ID = None
-ACTION_RESULT = None
-
-# create a header for the table
-header_cols = st.columns([3, 1, 1, 2, 2], vertical_alignment="center")
-header_cols[0].markdown("**File Name**")
-header_cols[1].markdown("**Bytes**")
-header_cols[2].markdown("**Rows**")
-header_cols[3].markdown("**Status**")
-header_cols[4].markdown("**Actions**")
-
-# Display each file's information in a row
-for i, row in df.iterrows():
-    cols = st.columns([3, 1, 1, 2, 2], vertical_alignment="center")
-
-    cols[0].write(row.file_name)
-    cols[1].write(row.file_size)
-    cols[2].write(row.number_rows)
-    cols[3].write(FileStatusEnum(row.file_status_id).name)
-
-    # Action buttons for each file
-    with cols[4]:
-        btn_cols = st.columns(2)
-        # process button
-        with btn_cols[0]:
-            if row.file_status_id != FileStatusEnum.PROCESSED.value:
+FILES_PAGE_SIZE = 25
+FILES_POLL_SECONDS = 2
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def load_files_page(
+    after, file_status_id, file_source, inserted_from, inserted_to
+) -> Result:
+    """One page of the file listing, cleared whenever files change."""
+    return file_handler.list_files(
+        FILES_PAGE_SIZE,
+        after=after,
+        file_status_id=file_status_id,
+        file_source=file_source,
+        inserted_from=inserted_from,
+        inserted_to=inserted_to,
+    )
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_file_sources() -> Result:
+    """Distinct file sources for the filter."""
+    return file_handler.get_file_sources()
+
+
+def files_changed() -> None:
+    """Clears the cached listing after an upload, delete or processing."""
+    load_files_page.clear()
+    load_file_sources.clear()
+
+
+# only a stored file changes the listing, files left in the uploader do not
+if UPLOAD_SUCCEEDED:
+    files_changed()
+
+# Filters
+filter_cols = st.columns([2, 2, 3])
+status_filter = filter_cols[0].selectbox(
+    "Status",
+    [None, *FileStatusEnum],
+    format_func=lambda status: "All" if status is None else status.name,
+)
+sources_result = load_file_sources()
+source_filter = filter_cols[1].selectbox(
+    "Source",
+    [None, *(sources_result.data if sources_result.success else [])],
+    format_func=lambda source: "All" if source is None else source,
+)
+date_filter = filter_cols[2].date_input("Uploaded between", value=())
+
+file_filters = (
+    status_filter.value if status_filter else None,
+    source_filter,
+    date_filter[0] if len(date_filter) > 0 else None,
+    date_filter[-1] if len(date_filter) > 1 else None,
+)
+
+# cursors of the pages already visited, reset when the filters change
+if st.session_state.get("file_filters") != file_filters:
+    st.session_state["file_filters"] = file_filters
+    st.session_state["file_cursors"] = [None]
+file_cursors = st.session_state["file_cursors"]
+
+
+def show_file_table() -> None:
+    """Renders one page of the file table with its actions and pagination."""
+    running_file_ids = pipeline_executor.running()
+
+    if running_file_ids:
+        # progress is read from the database while files are processed
+        load_files_page.clear()
+    elif st.session_state.get("files_polling"):
+        # the last file finished processing: rerun the page to stop polling
+        files_changed()
+        st.rerun()
+
+    #  Fetch one page of files from the database
+    list_files_result = load_files_page(file_cursors[-1], *file_filters)
+
+    if not list_files_result.success:
+        st.error(f"Something went wrong: {list_files_result.message}")
+        return
+
+    files_page = list_files_result.data
+
+    # create a header for the table
+    header_cols = st.columns([3, 1, 1, 2, 2], vertical_alignment="center")
+    header_cols[0].markdown("**File Name**")
+    header_cols[1].markdown("**Bytes**")
+    header_cols[2].markdown("**Rows**")
+    header_cols[3].markdown("**Status**")
+    header_cols[4].markdown("**Actions**")
+
+    # Display each file's information in a row
+    for row in files_page["files"]:
+        cols = st.columns([3, 1, 1, 2, 2], vertical_alignment="center")
+
+        cols[0].write(row["file_name"])
+        cols[1].write(row["file_size"])
+        cols[2].write(row["number_rows"])
+
+        status = FileStatusEnum(row["file_status_id"]).name
+        if (
+            row["file_status_id"] == FileStatusEnum.IN_PROGRESS.value
+            and row["processing_stage"]
+        ):
+            status += f" · {row['processing_stage']}"
+            if row["rows_processed"] is not None:
+                status += f" {row['rows_processed']}/{row['number_rows']}"
+        cols[3].markdown(status, help=row["error_message"])
+
+        # Action buttons for each file
+        with cols[4]:
+            btn_cols = st.columns(2)
+            # process button
+            with btn_cols[0]:
+                if (
+                    row["file_status_id"] != FileStatusEnum.PROCESSED.value
+                    and row["file_id"] not in running_file_ids
+                ):
+                    if st.button(
+                        "▶️",
+                        key=f"file_{row['file_id']}",
+                        help="Process",
+                        use_container_width=True,
+                    ):
+                        st.session_state["file_action_result"] = (
+                            pipeline_executor.submit(
+                                row["file_id"], int(row["file_config_id"])
+                            )
+                        )
+                        files_changed()
+                        st.rerun()
+
+            # delete button
+            with btn_cols[1]:
                 if st.button(
-                    "▶️",
-                    key=f"file_{row.file_id}",
-                    help="Process",
+                    "❌",
+                    key=f"delete_{row['file_id']}",
+                    help="Delete",
                     use_container_width=True,
+                    disabled=row["file_id"] in running_file_ids,
                 ):
-                    CLICKED_FILE_ID = row.file_id
-                    ACTION_RESULT = pipeline(row.file_id, int(row.file_config_id))
-
-        # delete button
-        with btn_cols[1]:
-            if st.button(
-                "❌",
-                key=f"delete_{row.file_id}",
-                help="Delete",
-                use_container_width=True,
-            ):
-                delete_drive = drive_handler.delete_file(row.file_id)
-                delete_rec = file_handler.delete_file_metadata(row.file_id)
-                CLICKED_FILE_ID = row.file_id
-
-                if delete_drive.success and delete_rec.success:
-                    ACTION_RESULT = Result(
-                        success=True, message="Deleted successfully."
-                    )
-                else:
-                    ACTION_RESULT = Result(
-                        success=False,
-                        message=f"""
-                        Error deleting file:
-                        {delete_drive.message} / {delete_rec.message}
-                        """,
-                    )
+                    delete_drive = drive_handler.delete_file(row["file_id"])
+                    delete_rec = file_handler.delete_file_metadata(row["file_id"])
+                    get_file_cache().discard(row["checksum"])
+                    files_changed()
+
+                    if delete_drive.success and delete_rec.success:
+                        st.session_state["file_action_result"] = Result(
+                            success=True, message="Deleted successfully."
+                        )
+                    else:
+                        st.session_state["file_action_result"] = Result(
+                            success=False,
+                            message=f"""
+                            Error deleting file:
+                            {delete_drive.message} / {delete_rec.message}
+                            """,
+                        )
+                    st.rerun()
+
+    # Pagination
+    page_cols = st.columns([1, 1, 6], vertical_alignment="center")
+    if page_cols[0].button(
+        "◀️",
+        key="files_previous_page",
+        help="Previous page",
+        disabled=len(file_cursors) == 1,
+    ):
+        file_cursors.pop()
+        st.rerun()
+    if page_cols[1].button(
+        "▶️",
+        key="files_next_page",
+        help="Next page",
+        disabled=files_page["next_cursor"] is None,
+    ):
+        file_cursors.append(files_page["next_cursor"])
+        st.rerun()
+    page_cols[2].caption(f"Page {len(file_cursors)}")
+
+
+# poll the table while files are processed in the background
+st.session_state["files_polling"] = bool(pipeline_executor.running())
+st.fragment(
+    show_file_table,
+    run_every=FILES_POLL_SECONDS if st.session_state["files_polling"] else None,
+)()
+
+ACTION_RESULT = st.session_state.pop("file_action_result", None)
 
 if ACTION_RESULT:
     if ACTION_RESULT.success:
@@ -1,20 +1,53 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+from datetime import date, datetime
 from calendar import month_abbr as call_month_abbr
 
 from backend.analytics.gold_queries import (
-    get_monthly_summary,
-    get_previous_monthly_summary,
-    get_savings_rate_summary,
+    get_category_vs_budget,
+    get_dashboard_summary,
+    get_gold_version,
 )
+from backend.core.types import Result
 
 from backend.core.database_handler import DatabaseHandler
+from backend.core.settings import configure
 
 st.set_page_config(page_title="Expenses Dashboard", layout="wide")
 
+# backend modules read their settings from the Streamlit secrets
+configure(st.secrets)
+
+
+@st.cache_resource
+def get_db_handler() -> DatabaseHandler:
+    """Database handler is created once and reused across reruns and sessions."""
+    return DatabaseHandler()
+
+
 # Initialize database session
-db_handler = DatabaseHandler()
+db_handler = get_db_handler()
+
+
+@st.cache_data(ttl=30, show_spinner=False)
+def load_gold_version():
+    """Latest gold run, checked at most every 30 seconds."""
+    with db_handler.get_db_session() as session:
+        return get_gold_version(session).data
+
+
+@st.cache_data(max_entries=60, show_spinner=False)
+def load_dashboard_summary(transaction_month: date, gold_version) -> Result:
+    """Dashboard data of a month, queried again only after a new gold run."""
+    with db_handler.get_db_session() as session:
+        return get_dashboard_summary(session, transaction_month)
+
+
+@st.cache_data(max_entries=60, show_spinner=False)
+def load_category_vs_budget(transaction_month: date, gold_version) -> Result:
+    """Category expenses and budgets of a month, queried again after a new gold run."""
+    with db_handler.get_db_session() as session:
+        return get_category_vs_budget(session, transaction_month)
 
 # -- Filter: Select a specific month
 with st.sidebar:
@@ -29,112 +62,52 @@ with st.sidebar:
     report_month = month_abbr.index(report_month_str) + 1
 
 # convert report_month and report_year to a date object
-report_month_date = datetime(report_year, report_month, 1)
+report_month_date = date(report_year, report_month, 1)
 
 # -- KPIs: Display main KPIs
 st.title("📊 Financial Overview")
 
-# import data using get_monthly_summary function
+# import data using get_dashboard_summary function
 try:
-    with db_handler.get_db_session() as session:
-        # fetch monthly summary data for current and previous selected month
-        monthly_summary_result = get_monthly_summary(session, report_month_date)
-        previous_month_summary_result = get_previous_monthly_summary(
-            session, report_month_date
-        )
-
-        if monthly_summary_result.success:
-            col1, col2, col3 = st.columns(3)
-
-            if previous_month_summary_result.success:
-                try:
-                    total_expenses_diff = (
-                        monthly_summary_result.data.total_expenses
-                        - previous_month_summary_result.data.total_expenses
-                    )
-                    total_earnings_diff = (
-                        monthly_summary_result.data.total_earnings
-                        - previous_month_summary_result.data.total_earnings
-                    )
-                    total_savings_diff = (
-                        monthly_summary_result.data.total_savings
-                        - previous_month_summary_result.data.total_savings
-                    )
-
-                    total_expenses_change = (
-                        round(
-                            total_expenses_diff
-                            / previous_month_summary_result.data.total_expenses,
-                            4,
-                        )
-                        * 100
-                        if previous_month_summary_result.data.total_expenses
-                        else 0
-                    )
-                    total_earnings_change = (
-                        round(
-                            total_earnings_diff
-                            / previous_month_summary_result.data.total_earnings,
-                            4,
-                        )
-                        * 100
-                        if previous_month_summary_result.data.total_earnings
-                        else 0
-                    )
-                    total_savings_change = (
-                        round(
-                            total_savings_diff
-                            / previous_month_summary_result.data.total_savings,
-                            4,
-                        )
-                        * 100
-                        if previous_month_summary_result.data.total_savings
-                        else 0
-                    )
-
-                    col1.metric(
-                        "💸 Total Expenses",
-                        float(monthly_summary_result.data.total_expenses),
-                        f"{float(total_expenses_change)}%",
-                    )
-                    col2.metric(
-                        "💰 Total Earnings",
-                        float(monthly_summary_result.data.total_earnings),
-                        f"{float(total_earnings_change)}%",
-                    )
-                    col3.metric(
-                        "🧮 Total Savings",
-                        float(monthly_summary_result.data.total_savings),
-                        f"{float(total_savings_change)}%",
-                    )
-                except ZeroDivisionError:
-                    st.error(
-                        "Division by zero occurred while calculating percentage changes."
-                    )
-                except Exception as e:
-                    st.error(f"An unexpected error occurred while processing KPIs: {e}")
-            else:
-                col1.metric(
-                    "💸 Total Expenses",
-                    float(monthly_summary_result.data.total_expenses),
-                    "N/A",
-                )
-                col2.metric(
-                    "💰 Total Earnings",
-                    float(monthly_summary_result.data.total_earnings),
-                    "N/A",
-                )
-                col3.metric(
-                    "🧮 Total Savings",
-                    float(monthly_summary_result.data.total_savings),
-                    "N/A",
-                )
-                st.info(
-                    "No data available for the previous month to calculate changes."
-                )
-        else:
-            st.warning("No data available for the selected month.")
+    dashboard_result = load_dashboard_summary(report_month_date, load_gold_version())
+    # totals and month-over-month changes are precomputed in g_t_monthly_kpis
+    monthly_kpis = dashboard_result.data["kpis"]
+
+    if monthly_kpis:
+        col1, col2, col3 = st.columns(3)
+
+        for col, label, total, change in (
+            (
+                col1,
+                "💸 Total Expenses",
+                monthly_kpis.total_expenses,
+                monthly_kpis.expenses_change,
+            ),
+            (
+                col2,
+                "💰 Total Earnings",
+                monthly_kpis.total_earnings,
+                monthly_kpis.earnings_change,
+            ),
+            (
+                col3,
+                "🧮 Total Savings",
+                monthly_kpis.total_savings,
+                monthly_kpis.savings_change,
+            ),
+        ):
+            col.metric(
+                label,
+                float(total),
+                "N/A" if change is None else f"{float(change)}%",
+            )
+
+        if monthly_kpis.previous_total_expenses is None:
+            st.info("No data available for the previous month to calculate changes.")
+    else:
+        st.warning("No data available for the selected month.")
 except Exception as e:
+    dashboard_result = None
     st.error(f"An error occurred while fetching KPI data: {e}")
 
 st.markdown("---")
@@ -142,28 +115,41 @@ st.markdown("---")
 # --- Dashboard 1: Category vs. Budget ---
 st.subheader("📂 Expenses per Category vs Budget")
 
-# category_data = get_category_vs_budget(selected_month)
-# st.bar_chart(category_data.set_index("category")[["expenses", "budget"]])
+try:
+    category_result = load_category_vs_budget(report_month_date, load_gold_version())
+
+    if category_result.success:
+        category_data = pd.DataFrame(
+            category_result.data, columns=["category", "expenses", "budget"]
+        )
+        category_data[["expenses", "budget"]] = category_data[
+            ["expenses", "budget"]
+        ].apply(pd.to_numeric, errors="coerce")
+
+        st.bar_chart(
+            category_data.set_index("category")[["expenses", "budget"]], stack=False
+        )
+    else:
+        st.warning("No category data available for the selected month.")
+except Exception as e:
+    st.error(f"An error occurred while fetching category data: {e}")
 
 st.markdown("---")
 
 # --- Dashboard 2: Overall Savings Rate ---
 st.subheader("💼 Overall Savings Rate")
 
-with db_handler.get_db_session() as session:
-    savings_rate_result = get_savings_rate_summary(session)
-
-    if savings_rate_result.success:
-        # convert savings_rate to a DataFrame
-        savings_rate_df = pd.DataFrame(
-            [(r.transaction_month, r.savings_rate) for r in savings_rate_result.data],
-            columns=["transaction_month", "savings_rate"],
-        )
-        savings_rate_df["transaction_month"] = pd.to_datetime(
-            savings_rate_df["transaction_month"]
-        )
-        savings_rate_df["savings_rate"] = pd.to_numeric(
-            savings_rate_df["savings_rate"], errors="coerce"
-        )
+if dashboard_result and dashboard_result.data["savings_rate"]:
+    # convert savings_rate to a DataFrame
+    savings_rate_df = pd.DataFrame(
+        dashboard_result.data["savings_rate"],
+        columns=["transaction_month", "savings_rate"],
+    )
+    savings_rate_df["transaction_month"] = pd.to_datetime(
+        savings_rate_df["transaction_month"]
+    )
+    savings_rate_df["savings_rate"] = pd.to_numeric(
+        savings_rate_df["savings_rate"], errors="coerce"
+    )
 
-        st.line_chart(savings_rate_df.set_index("transaction_month"))
+    st.line_chart(savings_rate_df.set_index("transaction_month"))